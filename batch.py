@@ -0,0 +1,205 @@
+"""
+Batch mode: run many research queries concurrently in one process.
+
+Queries are read from a JSONL file, one object per line:
+
+    {"query": "What are the latest developments in AI safety?", "id": "ai-safety"}
+
+`id` is optional and names the report files. Up to BATCH_CONCURRENCY research
+graphs run at once on one event loop. They share the pooled HTTP clients, the
+page and search caches, the worker concurrency limiter, the RPM/TPM rate
+limiter and the process-wide LLM concurrency cap (see concurrency.py), so
+adding runs does not multiply the load on the API.
+
+Each query gets `<output dir>/<n>_<id>.md` and its usage breakdown next to it.
+`summary.json` records every run's status, latency, tokens and cost, and the
+batch's throughput. The graph's progress output goes to `batch.log` in the
+output directory.
+
+Configuration (environment variables):
+
+- BATCH_CONCURRENCY research runs in progress at once (default 4)
+- LLM_MAX_CONCURRENCY LLM requests in flight across all runs (default 32)
+
+Usage:
+    python batch.py queries.jsonl [--concurrency N] [--llm-concurrency N] [--output-dir DIR]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, TextIO
+
+from checkpoints import get_checkpoint_store
+from http_client import aclose_clients
+from main import save_report_to_file, save_usage_to_file
+from models import AgentState
+from nodes.research_agent import research_graph
+from rate_limiter import get_rate_limiter
+from run_context import run_context
+from tracing import trace_run
+
+
+def load_queries(path: str) -> List[dict]:
+    """Read `{"query": ..., "id": ...}` objects from a JSONL file, skipping blank lines."""
+    queries = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if not isinstance(item, dict) or not item.get("query"):
+                raise ValueError(f"{path}:{line_number}: expected an object with a 'query'")
+            queries.append(item)
+    return queries
+
+
+def report_name(index: int, item: dict) -> str:
+    """File name stem for a query's report: its position plus a slug of its id."""
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "_", str(item.get("id") or "")).strip("_")[:60]
+    return f"{index:03d}_{slug}" if slug else f"{index:03d}"
+
+
+async def run_query(index: int, item: dict, output_dir: Path, slots: asyncio.Semaphore, console: TextIO) -> dict:
+    """Run one query when a batch slot is free and save its report; never raises."""
+    enqueued = time.perf_counter()
+    output_file = output_dir / f"{report_name(index, item)}.md"
+    state = AgentState(query=item["query"], context={"output_file": str(output_file)})
+    record = {"index": index, "id": item.get("id"), "query": item["query"], "run_id": state.run_id}
+
+    async with slots:
+        started = time.perf_counter()
+        record["queued_seconds"] = round(started - enqueued, 3)
+        try:
+            with run_context(state.run_id) as run, trace_run(run.run_id, query=state.query):
+                result = await research_graph.ainvoke(state)
+            final_state = result if isinstance(result, AgentState) else AgentState(**result)
+            final_state.usage = run.usage.to_dict()
+            final_state.total_tokens_used = run.usage.totals.total_tokens
+
+            if final_state.final_report:
+                # Synthesis streams the report to its file; write it here only if it did not
+                if final_state.context.get("report_file") != str(output_file):
+                    save_report_to_file(final_state.final_report, str(output_file), final_state.query)
+                record["report"] = str(output_file)
+            save_usage_to_file(final_state, str(output_file))
+
+            record.update(
+                status=final_state.status,
+                tokens=run.usage.totals.total_tokens,
+                cost_usd=round(run.usage.totals.cost_usd, 6),
+                llm_calls=run.usage.totals.calls,
+                tool_calls=final_state.total_tool_calls,
+                errors=final_state.errors,
+            )
+        except Exception as e:
+            record.update(status="failed", errors=[f"{type(e).__name__}: {e}"])
+        record["seconds"] = round(time.perf_counter() - started, 3)
+
+    symbol = "✓" if record["status"] == "completed" else "✗"
+    print(
+        f"{symbol} [{index}] {record['status']} in {record['seconds']:.1f}s "
+        f"({record.get('tokens', 0):,} tokens): {item['query'][:60]}",
+        file=console, flush=True,
+    )
+    return record
+
+
+def summarize(records: List[dict], wall_seconds: float, concurrency: int) -> dict:
+    """Throughput and latency figures for the whole batch."""
+    latencies = sorted(r["seconds"] for r in records)
+    completed = [r for r in records if r["status"] == "completed"]
+    tokens = sum(r.get("tokens", 0) for r in records)
+
+    def percentile(q: float) -> float:
+        return latencies[min(len(latencies) - 1, int(round(q * (len(latencies) - 1))))] if latencies else 0.0
+
+    return {
+        "queries": len(records),
+        "completed": len(completed),
+        "failed": len(records) - len(completed),
+        "concurrency": concurrency,
+        "wall_seconds": round(wall_seconds, 3),
+        "queries_per_minute": round(len(records) / wall_seconds * 60, 2) if wall_seconds else 0.0,
+        "tokens_per_second": round(tokens / wall_seconds, 1) if wall_seconds else 0.0,
+        "latency_seconds": {
+            "mean": round(statistics.mean(latencies), 3) if latencies else 0.0,
+            "p50": round(percentile(0.5), 3),
+            "p95": round(percentile(0.95), 3),
+            "max": round(latencies[-1], 3) if latencies else 0.0,
+        },
+        # Time the same runs would have taken one after another
+        "sequential_seconds": round(sum(latencies), 3),
+        "total_tokens": tokens,
+        "total_cost_usd": round(sum(r.get("cost_usd", 0.0) for r in records), 6),
+        "llm": get_rate_limiter().metrics(),
+    }
+
+
+async def run_batch(queries: List[dict], output_dir: Path, concurrency: int) -> dict:
+    """Run every query with at most `concurrency` in progress; write reports and summary.json."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    console = sys.stdout
+    slots = asyncio.Semaphore(concurrency)
+
+    print(f"Running {len(queries)} queries, {concurrency} at a time → {output_dir}", file=console, flush=True)
+    started = time.perf_counter()
+    with open(output_dir / "batch.log", "w", encoding="utf-8") as log, contextlib.redirect_stdout(log):
+        try:
+            records = await asyncio.gather(*(
+                run_query(index, item, output_dir, slots, console) for index, item in enumerate(queries, 1)
+            ))
+        finally:
+            store = get_checkpoint_store()
+            if store is not None:
+                await asyncio.to_thread(store.flush)
+            await aclose_clients()
+    wall_seconds = time.perf_counter() - started
+
+    summary = {"summary": summarize(records, wall_seconds, concurrency), "runs": records}
+    with open(output_dir / "summary.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("queries", help="JSONL file of {\"query\": ..., \"id\": ...} objects")
+    parser.add_argument(
+        "--concurrency", type=int, default=int(os.getenv("BATCH_CONCURRENCY", "4")),
+        help="Research runs in progress at once",
+    )
+    parser.add_argument("--llm-concurrency", type=int, help="LLM requests in flight across all runs")
+    parser.add_argument("--output-dir", help="Directory for reports and summary.json (default reports/batch_<time>)")
+    args = parser.parse_args()
+
+    if args.llm_concurrency is not None:
+        os.environ["LLM_MAX_CONCURRENCY"] = str(args.llm_concurrency)
+    output_dir = Path(args.output_dir or Path("reports") / f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+
+    queries = load_queries(args.queries)
+    if not queries:
+        raise SystemExit(f"No queries in {args.queries}")
+
+    summary = asyncio.run(run_batch(queries, output_dir, max(1, args.concurrency)))["summary"]
+    latency = summary["latency_seconds"]
+    print(
+        f"\nBatch complete: {summary['completed']}/{summary['queries']} completed in {summary['wall_seconds']:.1f}s "
+        f"({summary['sequential_seconds']:.1f}s if run one at a time)"
+    )
+    print(f"Throughput: {summary['queries_per_minute']:.2f} queries/min, {summary['tokens_per_second']:,.0f} tokens/s")
+    print(f"Latency: mean {latency['mean']:.1f}s, p50 {latency['p50']:.1f}s, p95 {latency['p95']:.1f}s, max {latency['max']:.1f}s")
+    print(f"Tokens: {summary['total_tokens']:,}, cost ${summary['total_cost_usd']:.4f}")
+    print(f"Summary saved to: {output_dir / 'summary.json'}")
+
+
+if __name__ == "__main__":
+    main()
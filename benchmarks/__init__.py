@@ -0,0 +1,5 @@
+"""
+Offline benchmarks for the research system.
+
+Run from the repository root, e.g. `python -m benchmarks.extraction_benchmark`.
+"""
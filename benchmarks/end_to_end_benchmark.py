@@ -0,0 +1,194 @@
+"""
+Offline end-to-end benchmark of the research graph.
+
+Runs `research_graph.ainvoke` against a scripted chat model (benchmarks/fakes.py),
+a DDGS stand-in and a local HTTP server serving benchmarks/fixtures, so no
+API key or network is needed and every run makes the same calls. Reports:
+
+- end-to-end wall time per run
+- per-node wall time, and the part of it not spent waiting on the model
+- fetch throughput through the shared AsyncClient, and parse-only throughput
+- the size of a condensed search_and_fetch result with many pages; the run
+  fails if it exceeds TOOL_RESULT_TOKEN_BUDGET
+
+With the default --llm-latency 0 the numbers are the system's own overhead;
+set it (and --http-latency) to model a realistic run's scheduling.
+
+Usage:
+    python -m benchmarks.end_to_end_benchmark [--runs N] [--phases N] [--workers N]
+        [--tool-rounds N] [--llm-latency S] [--http-latency S] [--fetches N]
+        [--condense-pages N] [--verbose]
+"""
+
+import argparse
+import asyncio
+import atexit
+import contextlib
+import io
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+# Keep runs repeatable: nothing cached between runs, no pacing, no trace or
+# checkpoint writes. If tracing or checkpointing is switched back on, it goes
+# to a temporary directory rather than the real traces/ and checkpoint DB.
+BENCHMARK_DIR = tempfile.mkdtemp(prefix="research-benchmark-")
+atexit.register(shutil.rmtree, BENCHMARK_DIR, ignore_errors=True)
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("PAGE_CACHE_ENABLED", "false")
+os.environ.setdefault("SEARCH_CACHE_TTL", "0")
+os.environ.setdefault("OPENAI_RPM_LIMIT", "0")
+os.environ.setdefault("OPENAI_TPM_LIMIT", "0")
+os.environ.setdefault("TRACING_ENABLED", "false")
+os.environ.setdefault("CHECKPOINT_ENABLED", "false")
+os.environ["TRACE_DIR"] = os.path.join(BENCHMARK_DIR, "traces")
+os.environ["CHECKPOINT_PATH"] = os.path.join(BENCHMARK_DIR, "checkpoints.sqlite3")
+
+import helpers  # noqa: E402
+from benchmarks.fakes import ScriptedChatModel, install_fakes  # noqa: E402
+from benchmarks.fixture_server import FixtureServer  # noqa: E402
+from http_client import aclose_clients  # noqa: E402
+from models import AgentState  # noqa: E402
+from nodes.research_agent import research_graph  # noqa: E402
+from passages import condense_tool_result  # noqa: E402
+from run_context import run_context  # noqa: E402
+from utils import count_tokens  # noqa: E402
+
+QUERY = "Benchmark query: compare the approaches described in the fixture pages"
+
+
+def summarize(samples: list) -> str:
+    """Mean, median and p95 of a list of seconds."""
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return f"mean {statistics.mean(ordered):.3f}s  median {statistics.median(ordered):.3f}s  p95 {p95:.3f}s"
+
+
+async def run_graph(verbose: bool) -> tuple:
+    """Run the research graph once; return (wall seconds, final state, node usage)."""
+    state = AgentState(query=QUERY)
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with output, run_context(state.run_id) as run:
+        started = time.perf_counter()
+        result = await research_graph.ainvoke(state)
+        elapsed = time.perf_counter() - started
+    final_state = result if isinstance(result, AgentState) else AgentState(**result)
+    return elapsed, final_state, run.usage.breakdown["node"]
+
+
+async def bench_graph(args) -> None:
+    print(f"End-to-end: {args.runs} run(s), {args.phases} phase(s) x {args.workers} worker(s), "
+          f"{args.tool_rounds} tool round(s), LLM latency {args.llm_latency}s")
+
+    # Warm-up: imports, graph compilation, connection pool
+    await run_graph(verbose=False)
+
+    walls = []
+    nodes = {}
+    for _ in range(args.runs):
+        elapsed, final_state, by_node = await run_graph(args.verbose)
+        if final_state.status != "completed":
+            raise SystemExit(f"Run ended with status {final_state.status!r}: {final_state.errors}")
+        walls.append(elapsed)
+        for name, usage in by_node.items():
+            nodes.setdefault(name, []).append((usage.wall_seconds, usage.llm_seconds, usage.calls))
+
+    print(f"  wall time   {summarize(walls)}")
+    print(f"\n  {'node':<14} {'calls':>6} {'wall s':>9} {'llm s':>9} {'overhead s':>11}")
+    for name, samples in nodes.items():
+        wall = statistics.median(s[0] for s in samples)
+        llm = statistics.median(s[1] for s in samples)
+        calls = statistics.median(s[2] for s in samples)
+        print(f"  {name:<14} {calls:>6.0f} {wall:>9.3f} {llm:>9.3f} {wall - llm:>11.3f}")
+    print("  (worker LLM calls overlap, so execution's llm s can exceed its wall time)")
+
+
+async def bench_fetch(urls: list, fetches: int, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    total_bytes = 0
+
+    async def fetch(url):
+        nonlocal total_bytes
+        async with semaphore:
+            result = await helpers._afetch_page(url)
+        total_bytes += result.bytes_read
+
+    targets = [urls[i % len(urls)] for i in range(fetches)]
+    await fetch(targets[0])  # open the connection pool
+    total_bytes = 0
+
+    started = time.perf_counter()
+    await asyncio.gather(*(fetch(url) for url in targets))
+    elapsed = time.perf_counter() - started
+    print(f"\nFetch + parse: {fetches} pages, concurrency {concurrency}")
+    print(f"  {fetches / elapsed:>8.1f} pages/s  {total_bytes / elapsed / 2**20:>6.2f} MiB/s  ({elapsed:.3f}s)")
+
+
+def bench_parse(pages: dict, repeat: int) -> None:
+    total_bytes = sum(len(body) for body in pages.values()) * repeat
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for body in pages.values():
+            helpers._page_text(body, "utf-8", "text/html")
+    elapsed = time.perf_counter() - started
+    count = len(pages) * repeat
+    print(f"\nParse only: {count} pages")
+    print(f"  {count / elapsed:>8.1f} pages/s  {total_bytes / elapsed / 2**20:>6.2f} MiB/s  ({elapsed:.3f}s)")
+
+
+def check_condense_budget(pages: dict, count: int) -> None:
+    """Condense a search_and_fetch result of `count` pages and fail if it exceeds the budget."""
+    texts = [helpers._page_text(body, "utf-8", "text/html") for body in pages.values()]
+    result = [
+        {"url": f"https://example.com/{i}", "title": f"Page {i}", "content": texts[i % len(texts)]}
+        for i in range(count)
+    ]
+    before = sum(count_tokens(page["content"]) for page in result)
+    condense_tool_result("search_and_fetch", {"query": QUERY}, result, QUERY)
+    after = sum(count_tokens(page["content"]) for page in result)
+    budget = int(os.getenv("TOOL_RESULT_TOKEN_BUDGET", "2000"))
+    print(f"\nCondensed search_and_fetch result: {count} pages")
+    print(f"  {before} -> {after} content tokens (budget {budget})")
+    if after > budget:
+        print(f"\n✗ Condensed result exceeds TOOL_RESULT_TOKEN_BUDGET by {after - budget} tokens")
+        raise SystemExit(1)
+
+
+async def run(args) -> None:
+    with FixtureServer(latency=args.http_latency) as server:
+        urls = server.urls()
+        install_fakes(
+            ScriptedChatModel(
+                latency=args.llm_latency, phases=args.phases, workers=args.workers, tool_rounds=args.tool_rounds,
+            ),
+            urls,
+        )
+        try:
+            await bench_graph(args)
+            await bench_fetch(urls, args.fetches, args.concurrency)
+            bench_parse(server.pages, max(1, args.fetches // len(urls)))
+            check_condense_budget(server.pages, args.condense_pages)
+        finally:
+            await aclose_clients()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Measured graph runs (after one warm-up)")
+    parser.add_argument("--phases", type=int, default=2, help="Phases in the scripted plan")
+    parser.add_argument("--workers", type=int, default=3, help="Workers per phase")
+    parser.add_argument("--tool-rounds", type=int, default=2, help="Tool-calling rounds per worker")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds each model call takes")
+    parser.add_argument("--http-latency", type=float, default=0.0, help="Seconds each fixture request takes")
+    parser.add_argument("--fetches", type=int, default=200, help="Pages fetched in the throughput test")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent fetches in the throughput test")
+    parser.add_argument("--condense-pages", type=int, default=20, help="Pages in the condensed result check")
+    parser.add_argument("--verbose", action="store_true", help="Show the graph's own progress output")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
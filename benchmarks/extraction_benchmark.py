@@ -0,0 +1,167 @@
+"""
+Benchmark the HTML extraction backends over a corpus of saved pages.
+
+Reports per-backend throughput and, for each fixture, how closely the fast
+backend's output matches the BeautifulSoup reference: word similarity, raw
+recall, and content recall. Exits with status 1 if a backend falls below
+MIN_SIMILARITY or MIN_RECALL on a fixture, or below MIN_CONTENT_RECALL on a
+fixture listed in INTENDED_DROPS.
+
+Content recall compares against the reference extracted from the page without
+the elements whose class or id marks them as boilerplate (comments, sidebars,
+related links; see extraction.NEGATIVE_HINTS). The lxml backend drops those
+on purpose, so fixtures that have them are listed in INTENDED_DROPS and are
+held to MIN_CONTENT_RECALL instead of the raw similarity and recall floors.
+What lxml drops on purpose:
+
+- blog_post.html: the "sidebar-left" archive list, the "widget subscribe"
+  newsletter box inside it, and the "comments" thread (similarity 0.837,
+  raw recall 0.720, content recall 1.000)
+
+Usage:
+    python -m benchmarks.extraction_benchmark [--fixtures DIR] [--repeat N]
+"""
+
+import argparse
+import difflib
+import time
+from collections import Counter
+from pathlib import Path
+
+import lxml.html
+
+from extraction import BACKENDS, _class_weight, extract_with_bs4
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+REFERENCE_BACKEND = "bs4"
+
+# Least word similarity and raw recall against the reference
+MIN_SIMILARITY = 0.95
+MIN_RECALL = 0.95
+
+# Least share of the content reference's words an extraction must keep
+MIN_CONTENT_RECALL = 0.9
+
+# Fixtures whose boilerplate the lxml backend drops on purpose, and what it drops
+INTENDED_DROPS = {
+    "blog_post.html": "sidebar archive list, subscribe widget, comment thread",
+}
+
+
+def load_fixtures(directory: Path) -> dict:
+    """Load every .html file in `directory` keyed by file name."""
+    pages = {
+        path.name: path.read_text(encoding="utf-8", errors="replace")
+        for path in sorted(directory.glob("*.html"))
+    }
+    if not pages:
+        raise SystemExit(f"No .html fixtures found in {directory}")
+    return pages
+
+
+def time_backend(extract, pages: dict, repeat: int) -> float:
+    """Return the best wall time over `repeat` passes through every page."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for html in pages.values():
+            extract(html)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def parity(reference: str, candidate: str) -> tuple:
+    """
+    Compare two extractions word by word.
+
+    Returns (similarity, recall): the difflib ratio of the word sequences and
+    the fraction of reference words that also appear in the candidate.
+    """
+    ref_words = reference.split()
+    cand_words = candidate.split()
+    similarity = difflib.SequenceMatcher(None, ref_words, cand_words, autojunk=False).ratio()
+    ref_counts = Counter(ref_words)
+    overlap = sum((ref_counts & Counter(cand_words)).values())
+    recall = overlap / len(ref_words) if ref_words else 1.0
+    return similarity, recall
+
+
+def content_reference(html: str) -> str:
+    """The bs4 extraction of `html` without elements marked as boilerplate by class or id."""
+    root = lxml.html.fromstring(html.encode("utf-8", errors="replace"))
+    for el in list(root.iter()):
+        if isinstance(el.tag, str) and _class_weight(el) < 0:
+            el.drop_tree()
+    return extract_with_bs4(lxml.html.tostring(root, encoding="unicode"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES_DIR, help="Directory of saved .html pages")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing passes per backend (best is reported)")
+    args = parser.parse_args()
+
+    pages = load_fixtures(args.fixtures)
+    total_bytes = sum(len(html.encode("utf-8")) for html in pages.values())
+    print(f"Corpus: {len(pages)} pages, {total_bytes / 1024:.0f} KiB\n")
+
+    print(f"{'backend':<8} {'total ms':>10} {'ms/page':>10} {'pages/s':>10} {'MiB/s':>8}")
+    timings = {}
+    for name, extract in BACKENDS.items():
+        elapsed = time_backend(extract, pages, args.repeat)
+        timings[name] = elapsed
+        print(
+            f"{name:<8} {elapsed * 1000:>10.1f} {elapsed * 1000 / len(pages):>10.2f} "
+            f"{len(pages) / elapsed:>10.1f} {total_bytes / elapsed / 2**20:>8.2f}"
+        )
+
+    for name, elapsed in timings.items():
+        if name != REFERENCE_BACKEND:
+            print(f"\nSpeedup {name} vs {REFERENCE_BACKEND}: {timings[REFERENCE_BACKEND] / elapsed:.1f}x")
+
+    print(f"\nOutput parity against {REFERENCE_BACKEND}:")
+    print(
+        f"{'fixture':<28} {'backend':<8} {'similarity':>10} {'recall':>8} "
+        f"{'content recall':>15} {'ref chars':>10} {'chars':>8}"
+    )
+    failures = []
+    for fixture, html in pages.items():
+        reference = BACKENDS[REFERENCE_BACKEND](html)
+        content = content_reference(html)
+        for name, extract in BACKENDS.items():
+            if name == REFERENCE_BACKEND:
+                continue
+            candidate = extract(html)
+            similarity, recall = parity(reference, candidate)
+            _, content_recall = parity(content, candidate)
+            if fixture in INTENDED_DROPS:
+                if content_recall < MIN_CONTENT_RECALL:
+                    failures.append(f"{fixture} ({name}): content recall {content_recall:.3f} < {MIN_CONTENT_RECALL}")
+            else:
+                if similarity < MIN_SIMILARITY:
+                    failures.append(f"{fixture} ({name}): similarity {similarity:.3f} < {MIN_SIMILARITY}")
+                if recall < MIN_RECALL:
+                    failures.append(f"{fixture} ({name}): recall {recall:.3f} < {MIN_RECALL}")
+            print(
+                f"{fixture:<28} {name:<8} {similarity:>10.3f} {recall:>8.3f} "
+                f"{content_recall:>15.3f} {len(reference):>10} {len(candidate):>8}"
+            )
+
+    if INTENDED_DROPS:
+        print("\nDropped on purpose (held to content recall only):")
+        for fixture, dropped in INTENDED_DROPS.items():
+            print(f"  {fixture}: {dropped}")
+
+    if failures:
+        print("\n✗ Output parity below threshold:")
+        for failure in failures:
+            print(f"  {failure}")
+        raise SystemExit(1)
+    print(
+        f"\n✓ Similarity at least {MIN_SIMILARITY} and recall at least {MIN_RECALL}, "
+        f"or content recall at least {MIN_CONTENT_RECALL} where listed above"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Deterministic stand-ins for the OpenAI chat model and DuckDuckGo search.
+
+`ScriptedChatModel` answers every node of the research graph without an API:
+
+- structured output for ExecutionPlan: a plan of `phases` x `workers` tasks
+- structured output for EvaluationResult: research marked complete
+- tool-bound worker calls: `tool_rounds` rounds of search_and_fetch / fetch
+  calls, then a final answer
+- anything else (synthesis): a markdown report, streamed in chunks by `astream`
+
+Every response carries usage metadata and waits `latency` seconds first.
+`FakeDDGS` returns the fixture server's pages for any query.
+"""
+
+import asyncio
+import hashlib
+import time
+from typing import Any, AsyncIterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from models import EvaluationResult, ExecutionPhase, ExecutionPlan, WorkerTask
+from utils import count_message_tokens
+
+FAKE_MODEL_NAME = "gpt-5-nano-scripted"
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model that follows a fixed script for each kind of research graph call."""
+
+    latency: float = 0.0
+    phases: int = 2
+    workers: int = 3
+    tool_rounds: int = 2
+    urls: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(messages, bool(kwargs.get("tools")))
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(messages, bool(kwargs.get("tools")))
+
+    def _respond(self, messages: List[BaseMessage], tools: bool) -> ChatResult:
+        """The scripted response: a worker turn when tools are bound, otherwise a report."""
+        if tools:
+            message = self._worker_turn(messages)
+        else:
+            message = AIMessage(content=self._report(messages))
+        message.usage_metadata = self._usage(messages, message)
+        message.response_metadata = {"model_name": FAKE_MODEL_NAME}
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(
+        self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        report = self._report(messages)
+        words = report.split(" ")
+        for i, word in enumerate(words):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else " " + word))
+        usage = self._usage(messages, AIMessage(content=report))
+        yield ChatGenerationChunk(message=AIMessageChunk(
+            content="", usage_metadata=usage, response_metadata={"model_name": FAKE_MODEL_NAME},
+        ))
+
+    def _usage(self, messages: List[BaseMessage], message: AIMessage) -> dict:
+        input_tokens = count_message_tokens(messages)
+        output_tokens = count_message_tokens([message])
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+    def _worker_turn(self, messages: List[BaseMessage]) -> AIMessage:
+        """The next step of a worker: a tool call per round, then the answer."""
+        rounds_done = sum(1 for m in messages if isinstance(m, AIMessage) and m.tool_calls)
+        task = messages[1].content if len(messages) > 1 else ""
+        seed = int(hashlib.sha1(task.encode("utf-8")).hexdigest(), 16)
+
+        if rounds_done < self.tool_rounds:
+            if rounds_done % 2 == 0 or not self.urls:
+                call = {"name": "search_and_fetch", "args": {"query": f"topic {seed % 97} round {rounds_done}"}}
+            else:
+                call = {"name": "fetch", "args": {"url": self.urls[(seed + rounds_done) % len(self.urls)]}}
+            call["id"] = f"call_{seed % 10**8}_{rounds_done}"
+            return AIMessage(content="", tool_calls=[call])
+
+        sources = sorted({
+            url for m in messages if isinstance(m, ToolMessage)
+            for url in self.urls if url in m.content
+        })
+        findings = "\n".join(f"- Finding from {url}" for url in sources) or "- No sources found"
+        return AIMessage(content=f"## Findings\n\n{findings}\n")
+
+    def _report(self, messages: List[BaseMessage]) -> str:
+        return "# Research Report\n\n" + "\n\n".join(
+            f"## Section {i}\n\nSynthesized content for section {i}." for i in range(1, 6)
+        )
+
+    def _plan(self) -> ExecutionPlan:
+        phases = []
+        for p in range(1, self.phases + 1):
+            tasks = [
+                WorkerTask(
+                    task_id=f"p{p}_t{w}",
+                    name=f"Phase {p} task {w}",
+                    description=f"Research area {w} of phase {p}",
+                    detailed_task_outline=f"OBJECTIVE: research area {w} of phase {p}",
+                    needs_web_search=True,
+                    expected_output="Bullet list of findings with sources",
+                )
+                for w in range(1, self.workers + 1)
+            ]
+            phases.append(ExecutionPhase(phase_id=f"p{p}", name=f"Phase {p}", description=f"Phase {p}", worker_tasks=tasks))
+        return ExecutionPlan(summary="Scripted plan", phases=phases, strategy_rationale="Scripted benchmark plan")
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools])
+
+    def with_structured_output(self, schema, include_raw: bool = False, **kwargs):
+        def structured(raw: AIMessage) -> Any:
+            if schema is ExecutionPlan:
+                parsed = self._plan()
+            elif schema is EvaluationResult:
+                parsed = EvaluationResult(
+                    is_complete=True,
+                    completeness_score=0.9,
+                    missing_aspects=[],
+                    recommendation="conclude",
+                    justification="Scripted evaluation",
+                )
+            else:
+                raise ValueError(f"No script for structured output {schema!r}")
+            raw.content = parsed.model_dump_json()
+            if include_raw:
+                return {"raw": raw, "parsed": parsed, "parsing_error": None}
+            return parsed
+
+        def respond(messages: List[BaseMessage]) -> Any:
+            return structured(self.invoke(messages))
+
+        async def arespond(messages: List[BaseMessage]) -> Any:
+            return structured(await self.ainvoke(messages))
+
+        return RunnableLambda(respond, afunc=arespond)
+
+
+class FakeDDGS:
+    """Stand-in for `ddgs.DDGS` returning fixture pages for every query."""
+
+    urls: List[str] = []
+
+    def __enter__(self) -> "FakeDDGS":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+    def text(self, query: str, max_results: Optional[int] = 5) -> List[dict]:
+        offset = int(hashlib.sha1(query.encode("utf-8")).hexdigest(), 16) % max(1, len(self.urls))
+        ordered = self.urls[offset:] + self.urls[:offset]
+        return [
+            {"title": f"Result for {query}", "href": url, "body": f"Snippet about {query} from {url}"}
+            for url in ordered[:max_results]
+        ]
+
+
+def install_fakes(chat_model: ScriptedChatModel, urls: List[str]) -> None:
+    """
+    Route every LLM and search call of the research graph to the fakes.
+
+    Patches `get_llm` where the nodes imported it, and `DDGS` in helpers.
+    """
+    import helpers
+    import utils
+    from nodes import evaluation, planning, synthesis, worker_agent
+
+    chat_model.urls = list(urls)
+    FakeDDGS.urls = list(urls)
+
+    def get_llm(temperature: float = 0, tools=None, model: Optional[str] = None):
+        return chat_model.bind_tools(tools) if tools else chat_model
+
+    for module in (utils, planning, evaluation, synthesis, worker_agent):
+        module.get_llm = get_llm
+    helpers.DDGS = FakeDDGS
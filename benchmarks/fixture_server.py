@@ -0,0 +1,79 @@
+"""
+Local HTTP server that serves the saved fixture pages.
+
+Pages are served at `/<fixture name>` (e.g. `/news_article.html`) from a
+background thread on an ephemeral port, with an optional per-request delay
+to imitate network latency.
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+class FixtureServer:
+    """Serve every .html file of a directory until `stop()` (or the `with` block ends)."""
+
+    def __init__(self, directory: Path = FIXTURES_DIR, latency: float = 0.0):
+        self.pages: Dict[str, bytes] = {
+            f"/{path.name}": path.read_bytes() for path in sorted(directory.glob("*.html"))
+        }
+        if not self.pages:
+            raise SystemExit(f"No .html fixtures found in {directory}")
+        self.latency = latency
+        self.requests = 0
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                body = server.pages.get(self.path.split("?", 1)[0])
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def urls(self) -> List[str]:
+        """URLs of every served page."""
+        return [f"{self.base_url}{path}" for path in self.pages]
+
+    def start(self) -> "FixtureServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FixtureServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,78 @@
+"""
+Microbenchmark of per-worker startup overhead.
+
+"before" repeats what every worker used to do: compile a fresh worker graph,
+create a ChatOpenAI client, bind the tool schemas and build the tool registry.
+"after" uses the shared compiled graph, bound LLM and registry. No API calls
+are made.
+
+Usage:
+    python -m benchmarks.worker_startup_benchmark [--workers N]
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+# Constructing ChatOpenAI requires a key even though nothing is sent
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from langchain_openai import ChatOpenAI  # noqa: E402
+
+from nodes.worker_agent import _build_worker_graph, get_worker_graph, get_worker_llm  # noqa: E402
+from tools import get_all_tools, get_tools_by_name  # noqa: E402
+from utils import DEFAULT_MODEL  # noqa: E402
+
+
+def startup_before(needs_web_search: bool, temperature: float):
+    """Per-worker setup as done before graphs and bound LLMs were cached."""
+    graph = _build_worker_graph(needs_web_search)
+    tools = get_all_tools() if needs_web_search else []
+    llm = ChatOpenAI(model=DEFAULT_MODEL, temperature=temperature).bind_tools(tools)
+    tools_by_name = {tool.name: tool for tool in get_all_tools()}
+    return graph, llm, tools_by_name
+
+
+def startup_after(needs_web_search: bool, temperature: float):
+    """Per-worker setup with the shared compiled graph, bound LLM and registry."""
+    return get_worker_graph(needs_web_search), get_worker_llm(temperature, needs_web_search), get_tools_by_name()
+
+
+def measure(startup, workers: int) -> list:
+    """Time `startup` for `workers` tasks alternating between both graph shapes."""
+    samples = []
+    for i in range(workers):
+        started = time.perf_counter()
+        startup(i % 2 == 0, 0.0)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=200, help="Worker startups to time per variant")
+    args = parser.parse_args()
+
+    # Warm imports and the caches so "after" measures steady-state reuse
+    startup_before(True, 0.0)
+    startup_after(True, 0.0)
+    startup_after(False, 0.0)
+
+    print(f"{'variant':<8} {'mean ms':>10} {'median ms':>10} {'p95 ms':>10} {'total s':>9}")
+    results = {}
+    for name, startup in (("before", startup_before), ("after", startup_after)):
+        samples = measure(startup, args.workers)
+        results[name] = statistics.mean(samples)
+        ordered = sorted(samples)
+        p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+        print(
+            f"{name:<8} {statistics.mean(samples) * 1000:>10.3f} {statistics.median(samples) * 1000:>10.3f} "
+            f"{p95 * 1000:>10.3f} {sum(samples):>9.3f}"
+        )
+
+    print(f"\nPer-worker startup overhead reduced {results['before'] / results['after']:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
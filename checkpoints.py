@@ -0,0 +1,211 @@
+"""
+Durable checkpoints of research runs, for resuming after a crash or failure.
+
+The research state is saved after every graph node that succeeds, and each
+worker task is saved as soon as it completes. Both go to a local SQLite file.
+`load(run_id)` rebuilds the latest good state and puts the saved task results
+back into its plan, so a resumed run continues from the node after the last
+checkpoint and skips every completed worker (see `main.resume`).
+
+Callers only serialize the record; a background thread compresses it and
+writes it, so checkpointing adds no disk I/O to the event loop.
+
+Configuration (environment variables):
+
+- CHECKPOINT_ENABLED (default true)
+- CHECKPOINT_PATH (default .cache/checkpoints.sqlite3 next to this file)
+- CHECKPOINT_MAX_AGE_DAYS runs older than this are deleted on startup (default 7)
+"""
+
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from typing import List, Optional, Tuple
+
+from models import AgentState, WorkerTask
+
+
+class _Blob(str):
+    """Serialized JSON that the writer thread compresses before storing."""
+
+
+class CheckpointStore:
+    """SQLite store of research state per run and of completed worker tasks."""
+
+    def __init__(self, path: str, max_age_days: float = 7):
+        self.path = path
+        self.writes = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                node TEXT NOT NULL,
+                status TEXT NOT NULL,
+                state BLOB NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                run_id TEXT NOT NULL,
+                iteration INTEGER NOT NULL,
+                phase_index INTEGER NOT NULL,
+                task_index INTEGER NOT NULL,
+                task_id TEXT NOT NULL,
+                task BLOB NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (run_id, iteration, phase_index, task_index)
+            )
+            """
+        )
+        cutoff = time.time() - max_age_days * 86400
+        self._conn.execute("DELETE FROM tasks WHERE run_id IN (SELECT run_id FROM runs WHERE updated_at < ?)", (cutoff,))
+        self._conn.execute("DELETE FROM runs WHERE updated_at < ?", (cutoff,))
+
+        self._queue: "queue.Queue[Tuple[str, tuple]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._writer = threading.Thread(target=self._write_loop, name="checkpoint-writer", daemon=True)
+        self._writer.start()
+
+    def save_state(self, state: AgentState, node: str) -> None:
+        """
+        Checkpoint the research state after `node` finished.
+
+        A failed node only updates the run's status; the stored state stays
+        at the last successful node, which is where a resume restarts.
+        """
+        now = time.time()
+        if state.status == "failed":
+            self._queue.put((
+                "UPDATE runs SET node = ?, status = ?, updated_at = ? WHERE run_id = ?",
+                (node, state.status, now, state.run_id),
+            ))
+            return
+        self._queue.put((
+            "INSERT OR REPLACE INTO runs (run_id, query, node, status, state, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (state.run_id, state.query, node, state.status, _Blob(state.model_dump_json()), now),
+        ))
+
+    def save_task(self, run_id: str, iteration: int, position: Tuple[int, int], task: WorkerTask) -> None:
+        """Checkpoint a completed worker task of planning iteration `iteration`."""
+        self._queue.put((
+            "INSERT OR REPLACE INTO tasks (run_id, iteration, phase_index, task_index, task_id, task, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (run_id, iteration, position[0], position[1], task.task_id, _Blob(task.model_dump_json()), time.time()),
+        ))
+
+    def load(self, run_id: str) -> Optional[AgentState]:
+        """
+        Return the run's last good state with completed tasks restored, or None.
+
+        Restored tasks keep status 'completed', which execution treats as done.
+        """
+        self.flush()
+        with self._lock:
+            row = self._conn.execute("SELECT state FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if row is None:
+                return None
+            state = AgentState.model_validate_json(zlib.decompress(row[0]))
+            task_rows = self._conn.execute(
+                "SELECT phase_index, task_index, task_id, task FROM tasks WHERE run_id = ? AND iteration = ?",
+                (run_id, state.planning_iteration),
+            ).fetchall()
+
+        plan = state.plan
+        if plan is None:
+            return state
+        for phase_index, task_index, task_id, blob in task_rows:
+            if phase_index >= len(plan.phases) or task_index >= len(plan.phases[phase_index].worker_tasks):
+                continue
+            if plan.phases[phase_index].worker_tasks[task_index].task_id != task_id:
+                continue
+            plan.phases[phase_index].worker_tasks[task_index] = WorkerTask.model_validate_json(zlib.decompress(blob))
+
+        # In a live run the current plan is also the last entry of plan_history
+        if state.plan_history and state.plan_history[-1].summary == plan.summary:
+            state.plan_history[-1] = plan
+        return state
+
+    def list_runs(self, limit: int = 20) -> List[dict]:
+        """The most recently updated runs, newest first."""
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT run_id, query, node, status, updated_at FROM runs ORDER BY updated_at DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [
+            {"run_id": run_id, "query": query, "node": node, "status": status, "updated_at": updated_at}
+            for run_id, query, node, status, updated_at in rows
+        ]
+
+    def flush(self) -> None:
+        """Block until every queued checkpoint has been written."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Write pending checkpoints and close the database connection."""
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def _write_loop(self) -> None:
+        """Write queued checkpoints, batching whatever has piled up into one transaction."""
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            with self._lock:
+                try:
+                    self._conn.execute("BEGIN")
+                    for sql, params in batch:
+                        self._conn.execute(sql, tuple(
+                            zlib.compress(p.encode("utf-8"), 6) if isinstance(p, _Blob) else p for p in params
+                        ))
+                    self._conn.execute("COMMIT")
+                    self.writes += len(batch)
+                except sqlite3.Error as e:
+                    print(f"⚠ Failed to write {len(batch)} checkpoint(s): {e}")
+                    if self._conn.in_transaction:
+                        self._conn.execute("ROLLBACK")
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+
+
+_checkpoint_store: Optional[CheckpointStore] = None
+_checkpoint_store_lock = threading.Lock()
+
+
+def get_checkpoint_store() -> Optional[CheckpointStore]:
+    """Return the process-wide checkpoint store, or None if checkpointing is disabled."""
+    global _checkpoint_store
+
+    if os.getenv("CHECKPOINT_ENABLED", "true").strip().lower() in ("0", "false", "no", "off"):
+        return None
+
+    with _checkpoint_store_lock:
+        if _checkpoint_store is None:
+            default_path = os.path.join(os.path.dirname(__file__), ".cache", "checkpoints.sqlite3")
+            _checkpoint_store = CheckpointStore(
+                path=os.getenv("CHECKPOINT_PATH", default_path),
+                max_age_days=float(os.getenv("CHECKPOINT_MAX_AGE_DAYS", "7")),
+            )
+            # Pending checkpoints are written before a normal interpreter exit
+            atexit.register(_checkpoint_store.flush)
+    return _checkpoint_store
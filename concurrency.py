@@ -0,0 +1,223 @@
+"""
+Adaptive concurrency control for worker agents.
+
+A single process-wide limiter decides how many workers may run at once.
+The limit follows AIMD (additive increase, multiplicative decrease) based on
+feedback from the workers' LLM calls:
+
+- each successful call while the limit is saturated adds 1/limit, so the
+  limit grows by about one per round of calls
+- a RateLimitError halves the limit
+- other API errors, or a smoothed latency above the target, cut it by a
+  smaller factor
+
+Decreases are applied at most once per cooldown period, so a burst of
+failures from calls that were already in flight only counts once.
+
+Configuration (environment variables):
+
+- WORKER_CONCURRENCY_INITIAL starting limit (default 3)
+- WORKER_CONCURRENCY_MIN lowest limit (default 1)
+- WORKER_CONCURRENCY_MAX highest limit (default 16)
+- WORKER_LATENCY_TARGET seconds per LLM call before backing off (default 30)
+- WORKER_CONCURRENCY_COOLDOWN seconds between decreases (default 10)
+
+A second, fixed limiter caps the LLM requests in flight across the whole
+process: every call of every node, in every research run sharing the event
+loop (see batch.py). It keeps concurrent runs within one budget.
+
+- LLM_MAX_CONCURRENCY requests in flight (default 32, 0 for no cap)
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional
+
+# Multiplicative decrease factors
+RATE_LIMIT_BACKOFF = 0.5
+ERROR_BACKOFF = 0.75
+LATENCY_BACKOFF = 0.9
+
+# Weight of the newest sample in the smoothed latency
+LATENCY_SMOOTHING = 0.2
+
+
+class AdaptiveLimiter:
+    """FIFO concurrency limiter whose limit adapts to API feedback."""
+
+    def __init__(
+        self,
+        initial: float = 3,
+        min_limit: float = 1,
+        max_limit: float = 16,
+        latency_target: float = 30.0,
+        cooldown: float = 10.0,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = min(max(initial, min_limit), max_limit)
+        self.latency_target = latency_target
+        self.cooldown = cooldown
+
+        self.in_flight = 0
+        self.latency: Optional[float] = None
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._last_decrease = float("-inf")
+
+        # Counters
+        self.successes = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.increases = 0
+        self.decreases = 0
+        self.peak_queue_depth = 0
+
+    @property
+    def capacity(self) -> int:
+        """Number of slots currently available in total."""
+        return max(int(self.min_limit), int(self.limit))
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of callers waiting for a slot."""
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    async def acquire(self) -> None:
+        """Wait for a slot. Slots are granted in arrival order."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Futures and slots from a previous event loop are gone
+            self._waiters.clear()
+            self.in_flight = 0
+            self._loop = loop
+
+        if self.in_flight < self.capacity and not self._waiters:
+            self.in_flight += 1
+            return
+
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        self.peak_queue_depth = max(self.peak_queue_depth, self.queue_depth)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just before the cancellation
+                self.release()
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+
+    def release(self) -> None:
+        """Return a slot and wake waiters that now fit under the limit."""
+        self.in_flight = max(0, self.in_flight - 1)
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one slot for the duration of the block."""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < self.capacity:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    def record_success(self, latency: float) -> None:
+        """Feed back a successful call and how long it took."""
+        self.successes += 1
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency = LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * self.latency
+
+        if self.latency > self.latency_target:
+            self._decrease(LATENCY_BACKOFF)
+        elif self.in_flight >= self.capacity or self._waiters:
+            # Only grow while the limit is what holds callers back
+            previous = self.capacity
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            if self.capacity > previous:
+                self.increases += 1
+                self._wake()
+
+    def record_rate_limited(self) -> None:
+        """Feed back a call rejected with a rate limit error."""
+        self.rate_limited += 1
+        self._decrease(RATE_LIMIT_BACKOFF)
+
+    def record_error(self) -> None:
+        """Feed back a call that failed with a (non rate limit) API error."""
+        self.errors += 1
+        self._decrease(ERROR_BACKOFF)
+
+    def _decrease(self, factor: float) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        previous = self.limit
+        self.limit = max(self.min_limit, self.limit * factor)
+        if self.limit < previous:
+            self.decreases += 1
+
+    def metrics(self) -> Dict[str, float]:
+        """Current limit, queue depth and feedback counters."""
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "peak_queue_depth": self.peak_queue_depth,
+            "latency": round(self.latency, 2) if self.latency is not None else None,
+            "successes": self.successes,
+            "rate_limited": self.rate_limited,
+            "errors": self.errors,
+            "increases": self.increases,
+            "decreases": self.decreases,
+        }
+
+
+_worker_limiter: Optional[AdaptiveLimiter] = None
+
+
+def get_worker_limiter() -> AdaptiveLimiter:
+    """Return the process-wide limiter shared by all worker agents."""
+    global _worker_limiter
+    if _worker_limiter is None:
+        _worker_limiter = AdaptiveLimiter(
+            initial=float(os.getenv("WORKER_CONCURRENCY_INITIAL", "3")),
+            min_limit=float(os.getenv("WORKER_CONCURRENCY_MIN", "1")),
+            max_limit=float(os.getenv("WORKER_CONCURRENCY_MAX", "16")),
+            latency_target=float(os.getenv("WORKER_LATENCY_TARGET", "30")),
+            cooldown=float(os.getenv("WORKER_CONCURRENCY_COOLDOWN", "10")),
+        )
+    return _worker_limiter
+
+
+_llm_limiter: Optional[AdaptiveLimiter] = None
+
+
+def get_llm_limiter() -> Optional[AdaptiveLimiter]:
+    """Return the process-wide cap on LLM requests in flight, or None if uncapped."""
+    global _llm_limiter
+    limit = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+    if limit <= 0:
+        return None
+    if _llm_limiter is None:
+        # Fixed size: no feedback is recorded, so the limit never moves
+        _llm_limiter = AdaptiveLimiter(initial=limit, min_limit=limit, max_limit=limit)
+    return _llm_limiter
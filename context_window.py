@@ -0,0 +1,172 @@
+"""
+Context-window management for the worker tool loop.
+
+Every worker iteration resends the whole conversation, so the prompt grows
+with each tool result. Before each LLM call the worker counts the prompt
+tokens; once they exceed the budget, the oldest tool results are condensed
+into a single "research notes" message and their ToolMessages are replaced
+with a short placeholder. The ToolMessages themselves are kept, so every tool
+call in an AI message still has its matching response.
+
+Configuration (environment variables):
+
+- WORKER_CONTEXT_TOKEN_BUDGET prompt tokens before compaction (default 16000)
+"""
+
+import ast
+import os
+import re
+from typing import Dict, List, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+from passages import bm25_scores, build_query, split_passages
+from utils import count_message_tokens, count_tokens, message_tokens
+
+NOTES_HEADER = "## Research notes (condensed from earlier tool results)"
+COMPACTED_PLACEHOLDER = "[Result condensed into the research notes above]"
+
+# Tokens kept per condensed tool result in the notes
+NOTE_TOKENS = 150
+
+# Index of the notes message: right after the system prompt and the task
+NOTES_INDEX = 2
+
+_URL = re.compile(r"'url': '([^']+)'")
+
+
+def context_budget() -> int:
+    """Return the prompt token budget for one worker LLM call."""
+    return int(os.getenv("WORKER_CONTEXT_TOKEN_BUDGET", "16000"))
+
+
+def _is_notes(message: BaseMessage) -> bool:
+    return isinstance(message, HumanMessage) and message.content.startswith(NOTES_HEADER)
+
+
+def _result_text(content: str) -> Tuple[List[str], str]:
+    """
+    Recover source URLs and page text from a tool result message.
+
+    Tool results are stored as the repr of a dict or list of dicts; anything
+    else is treated as plain text.
+    """
+    try:
+        parsed = ast.literal_eval(content)
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        return list(dict.fromkeys(_URL.findall(content))), content
+
+    pages = parsed if isinstance(parsed, list) else [parsed]
+    urls, texts = [], []
+    for page in pages:
+        if not isinstance(page, dict):
+            continue
+        if page.get("url"):
+            urls.append(page["url"])
+        texts.append(page.get("content") or page.get("snippet") or "")
+    return list(dict.fromkeys(urls)), "\n\n".join(t for t in texts if t)
+
+
+def _note_for(message: ToolMessage, call: dict, query_weights: Dict[str, float]) -> str:
+    """Condense one tool result into a short note."""
+    args = ", ".join(f"{key}={value!r}" for key, value in call.get("args", {}).items())
+    urls, text = _result_text(message.content)
+
+    # The most relevant passage, cut to the note size
+    passages = split_passages(text, NOTE_TOKENS) or [""]
+    scores = bm25_scores(passages, query_weights)
+    best = max(range(len(passages)), key=lambda i: scores[i])
+    excerpt = " ".join(passages[best].split())[: NOTE_TOKENS * 4]
+
+    lines = [f"- {call.get('name', 'tool')}({args})"]
+    if urls:
+        lines.append(f"  Sources: {', '.join(urls)}")
+    lines.append(f"  {excerpt}")
+    return "\n".join(lines)
+
+
+def compact_tool_history(messages: List[BaseMessage], budget: int, task_outline: str) -> Tuple[int, int]:
+    """
+    Condense old tool results until the conversation fits in `budget` tokens.
+
+    Tool results produced since the last AI message are never condensed, so
+    the model always sees the latest results in full. Messages are modified in
+    place.
+
+    Returns:
+        (tokens before, tokens after)
+    """
+    before = count_message_tokens(messages)
+    if before <= budget:
+        return before, before
+
+    # Tool call specs by id, to label the notes
+    calls = {
+        call["id"]: call
+        for message in messages
+        if isinstance(message, AIMessage)
+        for call in message.tool_calls or []
+    }
+
+    last_ai = max((i for i, m in enumerate(messages) if isinstance(m, AIMessage)), default=-1)
+    candidates = [
+        i for i, m in enumerate(messages[:last_ai])
+        if isinstance(m, ToolMessage) and m.content != COMPACTED_PLACEHOLDER
+    ]
+    if not candidates:
+        return before, before
+
+    if len(messages) > NOTES_INDEX and _is_notes(messages[NOTES_INDEX]):
+        notes = messages[NOTES_INDEX]
+    else:
+        notes = HumanMessage(content=NOTES_HEADER)
+        messages.insert(NOTES_INDEX, notes)
+        candidates = [i + 1 for i in candidates]
+
+    query_weights = build_query(task_outline)
+    total = count_message_tokens(messages)
+    for i in candidates:
+        if total <= budget:
+            break
+        message = messages[i]
+        removed = message_tokens(message)
+        note = _note_for(message, calls.get(message.tool_call_id, {}), query_weights)
+
+        message.content = COMPACTED_PLACEHOLDER
+        notes.content = f"{notes.content}\n\n{note}"
+        total += message_tokens(message) - removed + count_tokens(note)
+
+    return before, count_message_tokens(messages)
+
+
+def new_context_stats() -> Dict[str, int]:
+    """Per-worker prompt token counters."""
+    return {
+        "llm_calls": 0,
+        "prompt_tokens": 0,
+        "peak_prompt_tokens": 0,
+        "compactions": 0,
+        "tokens_compacted": 0,
+        "tokens_saved": 0,
+    }
+
+
+def prepare_worker_context(state: dict) -> None:
+    """
+    Enforce the context budget before a worker LLM call and update its stats.
+
+    `tokens_compacted` is how much smaller the conversation currently is than
+    it would be without compaction; `tokens_saved` sums that over every call.
+    """
+    stats = state.get("context_stats") or new_context_stats()
+    state["context_stats"] = stats
+    before, after = compact_tool_history(state["messages"], context_budget(), state["task"].detailed_task_outline)
+
+    if after < before:
+        stats["compactions"] += 1
+        stats["tokens_compacted"] += before - after
+
+    stats["llm_calls"] += 1
+    stats["prompt_tokens"] += after
+    stats["peak_prompt_tokens"] = max(stats["peak_prompt_tokens"], after)
+    stats["tokens_saved"] += stats["tokens_compacted"]
@@ -0,0 +1,357 @@
+"""
+HTML to markdown extraction backends for fetched pages.
+
+Two interchangeable backends turn a raw HTML document into the normalized
+markdown returned by the fetch tools:
+
+- "lxml": parses with lxml, picks the main content node (semantic containers
+  first, then a readability-style scoring pass) and renders markdown with a
+  single tree walk. This is the default and is several times faster.
+- "bs4": the original BeautifulSoup + markdownify pipeline, kept as a fallback.
+
+Select the backend with the EXTRACTION_BACKEND environment variable. If the
+lxml backend is unavailable, fails, or finds no content, extraction falls
+back to bs4.
+"""
+
+import os
+import re
+from typing import Callable, Dict, List, Optional
+
+from bs4 import BeautifulSoup
+from markdownify import markdownify
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # pragma: no cover - lxml is in requirements.txt
+    lxml = None
+
+# Elements that never contain main content
+BOILERPLATE_TAGS = ["script", "style", "nav", "header", "footer", "aside", "form", "iframe"]
+
+DEFAULT_BACKEND = "lxml"
+
+
+def _normalize(md: str) -> str:
+    """Strip every line, drop blank ones and separate the rest with blank lines."""
+    lines = [line.strip() for line in md.splitlines() if line.strip()]
+    return "\n\n".join(lines)
+
+
+# ==================== BEAUTIFULSOUP BACKEND ====================
+
+def extract_with_bs4(html: str) -> str:
+    """Extract main content with BeautifulSoup and markdownify."""
+    soup = BeautifulSoup(html, "html.parser")
+
+    for tag in soup(BOILERPLATE_TAGS):
+        tag.decompose()
+
+    main_content = (
+        soup.find("main")
+        or soup.find("article")
+        or soup.find("div", {"class": "content"})
+        or soup.find("body")
+    )
+
+    if main_content:
+        md = markdownify(str(main_content), heading_style="ATX", strip=["a"])
+        return _normalize(md)
+
+    return ""
+
+
+# ==================== LXML BACKEND ====================
+
+# Class/id tokens used by the readability-style scorer
+POSITIVE_HINTS = {
+    "article", "body", "content", "entry", "main", "page", "post", "text", "blog", "story",
+}
+NEGATIVE_HINTS = {
+    "comment", "comments", "footer", "foot", "sidebar", "sponsor", "ad", "ads", "advert", "banner",
+    "share", "social", "related", "menu", "nav", "promo", "popup", "cookie", "subscribe", "widget",
+}
+_HINT_SPLIT = re.compile(r"[^a-z0-9]+")
+
+# Elements whose text is scored as a paragraph
+SCORED_TAGS = {"p", "pre", "td", "blockquote"}
+
+# Least share of the page's content text the readability candidate must hold;
+# below it, the candidate's ancestors are used, so unmarked content next to it
+# (such as an abstract page's metadata and related blocks) is not dropped
+MIN_CONTENT_SHARE = 0.6
+
+BLOCK_TAGS = {
+    "p", "div", "section", "article", "main", "body", "figure", "figcaption",
+    "dl", "dt", "details", "summary", "address", "center",
+}
+HEADING_LEVELS = {"h1": 1, "h2": 2, "h3": 3, "h4": 4, "h5": 5, "h6": 6}
+BULLETS = "*+-"
+
+_WHITESPACE = re.compile(r"\s+")
+_MARKDOWN_SPECIAL = re.compile(r"([*_])")
+
+
+def _text_length(el) -> int:
+    """Length of an element's visible text with whitespace collapsed."""
+    return len(_WHITESPACE.sub(" ", el.text_content()).strip())
+
+
+def _link_density(el) -> float:
+    """Fraction of an element's text that sits inside links."""
+    total = _text_length(el)
+    if not total:
+        return 0.0
+    linked = sum(_text_length(a) for a in el.iter("a"))
+    return linked / total
+
+
+def _class_weight(el) -> int:
+    """Score adjustment from class and id attributes."""
+    weight = 0
+    for attr in (el.get("class"), el.get("id")):
+        if not attr:
+            continue
+        tokens = set(_HINT_SPLIT.split(attr.lower()))
+        if tokens & NEGATIVE_HINTS:
+            weight -= 25
+        if tokens & POSITIVE_HINTS:
+            weight += 25
+    return weight
+
+
+def _readability_candidate(body):
+    """
+    Pick the element most likely to hold the main content.
+
+    Each paragraph-like element contributes a score (one point, plus one per
+    comma, plus up to three for length) to its parent and half of that to its
+    grandparent. Candidates are then penalized by their link density.
+    """
+    scores: Dict[object, float] = {}
+
+    for el in body.iter(*SCORED_TAGS):
+        length = _text_length(el)
+        if length < 25:
+            continue
+        parent = el.getparent()
+        if parent is None:
+            continue
+        text = el.text_content()
+        score = 1 + text.count(",") + min(length / 100, 3)
+
+        for ancestor, share in ((parent, 1.0), (parent.getparent(), 0.5)):
+            if ancestor is None or not isinstance(ancestor.tag, str):
+                continue
+            if ancestor not in scores:
+                scores[ancestor] = float(_class_weight(ancestor))
+            scores[ancestor] += score * share
+
+    if not scores:
+        return None
+
+    return max(scores, key=lambda el: scores[el] * (1 - _link_density(el)))
+
+
+def _content_length(el) -> int:
+    """Length of an element's text outside links and class-marked boilerplate."""
+    if el.tag == "a" or _class_weight(el) < 0:
+        return 0
+    length = len((el.text or "").strip())
+    for child in el:
+        if isinstance(child.tag, str):
+            length += _content_length(child)
+        length += len((child.tail or "").strip())
+    return length
+
+
+def _has_class(el, name: str) -> bool:
+    """Return True if `name` is one of the element's classes."""
+    return name in (el.get("class") or "").split()
+
+
+def _find_main_content(root):
+    """Locate the main content element, mirroring the bs4 precedence before scoring."""
+    for tag in ("main", "article"):
+        for el in root.iter(tag):
+            return el
+    for el in root.iter("div"):
+        if _has_class(el, "content"):
+            return el
+
+    body = root.find(".//body")
+    if body is None:
+        body = root
+    candidate = _readability_candidate(body)
+    if candidate is None:
+        return body
+
+    # Widen a candidate that leaves most of the page's content outside it
+    required = MIN_CONTENT_SHARE * _content_length(body)
+    while candidate is not body and candidate.getparent() is not None and _content_length(candidate) < required:
+        candidate = candidate.getparent()
+    return candidate
+
+
+def _escape(text: str) -> str:
+    """Escape characters markdown would treat as emphasis."""
+    return _MARKDOWN_SPECIAL.sub(r"\\\1", text)
+
+
+class _MarkdownRenderer:
+    """Render an lxml element tree to markdown in a single pass."""
+
+    def __init__(self):
+        self.list_depth = 0
+
+    def render(self, el) -> str:
+        return self._element(el)
+
+    def _children(self, el, escape: bool = True) -> str:
+        parts: List[str] = []
+        if el.text:
+            parts.append(self._text(el.text, escape))
+        for child in el:
+            parts.append(self._element(child))
+            if child.tail:
+                parts.append(self._text(child.tail, escape))
+        return "".join(parts)
+
+    def _text(self, text: str, escape: bool) -> str:
+        text = _WHITESPACE.sub(" ", text)
+        return _escape(text) if escape else text
+
+    def _element(self, el) -> str:
+        tag = el.tag
+        if not isinstance(tag, str):
+            # Comments and processing instructions
+            return ""
+        tag = tag.lower()
+
+        if tag in HEADING_LEVELS:
+            text = self._children(el).strip()
+            return f"\n\n{'#' * HEADING_LEVELS[tag]} {text}\n\n" if text else ""
+        if tag in BLOCK_TAGS:
+            return f"\n\n{self._children(el)}\n\n"
+        if tag in ("ul", "ol"):
+            return self._list(el, ordered=tag == "ol")
+        if tag == "dd":
+            return f"\n:   {self._children(el).strip()}\n\n"
+        if tag == "li":
+            return f"\n{self._children(el).strip()}\n"
+        if tag == "pre":
+            return f"\n\n```\n{el.text_content().strip(chr(10))}\n```\n\n"
+        if tag == "code":
+            return f"`{_WHITESPACE.sub(' ', el.text_content())}`"
+        if tag == "blockquote":
+            body = _normalize(self._children(el))
+            quoted = "\n".join(f"> {line}" if line else ">" for line in body.split("\n"))
+            return f"\n\n{quoted}\n\n"
+        if tag in ("strong", "b"):
+            text = self._children(el).strip()
+            return f"**{text}**" if text else ""
+        if tag in ("em", "i"):
+            text = self._children(el).strip()
+            return f"*{text}*" if text else ""
+        if tag == "br":
+            return "  \n"
+        if tag == "hr":
+            return "\n\n---\n\n"
+        if tag == "img":
+            alt = el.get("alt") or ""
+            src = el.get("src") or ""
+            return f"![{alt}]({src})" if src else alt
+        if tag == "table":
+            return self._table(el)
+        if tag in BOILERPLATE_TAGS or tag in ("noscript", "template", "svg"):
+            return ""
+        return self._children(el)
+
+    def _list(self, el, ordered: bool) -> str:
+        self.list_depth += 1
+        bullet = BULLETS[(self.list_depth - 1) % len(BULLETS)]
+        lines = []
+        index = int(el.get("start") or 1) if ordered else 0
+        for child in el:
+            if not isinstance(child.tag, str) or child.tag.lower() != "li":
+                continue
+            text = self._children(child).strip()
+            marker = f"{index}." if ordered else bullet
+            lines.append(f"{marker} {text}")
+            index += 1
+        self.list_depth -= 1
+        return "\n\n" + "\n".join(lines) + "\n\n"
+
+    def _table(self, el) -> str:
+        rows = []
+        for tr in el.iter("tr"):
+            cells = [
+                _WHITESPACE.sub(" ", self._children(cell)).strip()
+                for cell in tr
+                if isinstance(cell.tag, str) and cell.tag.lower() in ("td", "th")
+            ]
+            if cells:
+                rows.append(cells)
+        if not rows:
+            return ""
+        lines = ["| " + " | ".join(rows[0]) + " |", "| " + " | ".join("---" for _ in rows[0]) + " |"]
+        lines.extend("| " + " | ".join(row) + " |" for row in rows[1:])
+        return "\n\n" + "\n".join(lines) + "\n\n"
+
+
+def extract_with_lxml(html: str) -> str:
+    """Extract main content with lxml and a readability-style content heuristic."""
+    if lxml is None:
+        raise ImportError("lxml is not installed")
+    if not html or not html.strip():
+        return ""
+
+    try:
+        root = lxml.html.fromstring(html)
+    except (etree.ParserError, ValueError):
+        # ValueError: str input that carries an XML encoding declaration
+        root = lxml.html.fromstring(html.encode("utf-8", errors="replace"))
+
+    for el in list(root.iter(*BOILERPLATE_TAGS)):
+        el.drop_tree()
+
+    main_content = _find_main_content(root)
+    if main_content is None:
+        return ""
+    return _normalize(_MarkdownRenderer().render(main_content))
+
+
+# ==================== DISPATCH ====================
+
+BACKENDS: Dict[str, Callable[[str], str]] = {
+    "lxml": extract_with_lxml,
+    "bs4": extract_with_bs4,
+}
+
+
+def extract_markdown(html: str, backend: Optional[str] = None) -> str:
+    """
+    Extract the main content of an HTML document as normalized markdown.
+
+    Args:
+        html: Raw HTML document
+        backend: "lxml" or "bs4"; defaults to EXTRACTION_BACKEND or "lxml"
+
+    Returns:
+        Markdown text, or an empty string if no content was found
+    """
+    backend = backend or os.getenv("EXTRACTION_BACKEND", DEFAULT_BACKEND)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown extraction backend '{backend}'. Choose from: {', '.join(BACKENDS)}")
+
+    if backend != "bs4":
+        try:
+            content = BACKENDS[backend](html)
+            if content:
+                return content
+        except Exception:
+            # Malformed markup the fast path can't handle; use the tolerant parser
+            pass
+
+    return extract_with_bs4(html)
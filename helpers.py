@@ -1,9 +1,34 @@
-import httpx
-from bs4 import BeautifulSoup
-from markdownify import markdownify
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
 from ddgs import DDGS
 from pydantic import BaseModel, Field
 
+from extraction import extract_markdown
+from http_client import get_async_client, get_sync_client
+from page_cache import canonicalize_url, get_page_cache
+from run_context import current_run
+from singleflight import SingleFlight
+from tracing import current_span, span
+
+# Seconds `_search_and_fetch` waits for result pages before falling back to snippets
+SEARCH_AND_FETCH_DEADLINE = 20.0
+
+# Default cap on decoded body bytes read per page (override with FETCH_MAX_BYTES)
+DEFAULT_FETCH_MAX_BYTES = 2 * 1024 * 1024
+
+# Non-text media types that are still worth parsing as markup
+MARKUP_MEDIA_TYPES = {"application/xhtml+xml", "application/xml"}
+
+# Recent search results keyed by (normalized query, max_results), oldest first
+_search_cache: "OrderedDict[tuple, tuple[float, list[SearchResult]]]" = OrderedDict()
+_search_cache_lock = threading.Lock()
+_search_flight = SingleFlight()
+
 
 class SearchResult(BaseModel):
     """One search result from a web search."""
@@ -12,6 +37,8 @@ class SearchResult(BaseModel):
     url: str = Field(..., description="The URL of the search result")
     snippet: str | None = Field(None, description="A short snippet or description of the result")
     content: str | None = Field(None, description="Full fetched markdown content (populated when fetched)")
+    truncated: bool | None = Field(None, description="Whether the fetched page was cut off at the byte limit")
+    bytes_truncated: int | None = Field(None, description="Body bytes not read because of the byte limit, if known")
 
 
 class FetchResult(BaseModel):
@@ -19,10 +46,18 @@ class FetchResult(BaseModel):
 
     url: str = Field(..., description="The URL that was fetched")
     content: str = Field(..., description="The extracted main content in markdown format")
+    content_type: str | None = Field(None, description="Media type reported by the server")
+    bytes_read: int = Field(0, description="Body bytes downloaded and parsed")
+    truncated: bool = Field(False, description="Whether the body was cut off at the byte limit")
+    bytes_truncated: int | None = Field(None, description="Body bytes not read because of the byte limit, if known")
 
 
-def _search(query: str, max_results: int = 5) -> list[SearchResult]:
-    """Search the web and return a list of SearchResult models."""
+class UnsupportedContentTypeError(ValueError):
+    """Raised when a URL serves content that can't be turned into text (PDFs, images, archives...)."""
+
+
+def _ddgs_search(query: str, max_results: int) -> list[SearchResult]:
+    """Run a DuckDuckGo text search."""
     with DDGS() as ddgs:
         results = ddgs.text(query, max_results=max_results)
         return [
@@ -35,41 +70,291 @@ def _search(query: str, max_results: int = 5) -> list[SearchResult]:
         ]
 
 
+def _search_key(query: str, max_results: int) -> tuple:
+    """Cache key for a search: case- and whitespace-insensitive query plus result count."""
+    return (" ".join(query.casefold().split()), max_results)
+
+
+def _search_cache_get(key: tuple) -> list[SearchResult] | None:
+    """Return copies of cached results for `key`, or None if absent or expired."""
+    with _search_cache_lock:
+        entry = _search_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, results = entry
+        if expires_at < time.monotonic():
+            del _search_cache[key]
+            return None
+        _search_cache.move_to_end(key)
+    # Callers fill in `content`, so never hand out the cached objects themselves
+    return [r.model_copy() for r in results]
+
+
+def _search_cache_put(key: tuple, results: list[SearchResult]) -> None:
+    """Store results for `key`, evicting the least recently used entries past the size limit."""
+    ttl = float(os.getenv("SEARCH_CACHE_TTL", "900"))
+    max_entries = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024"))
+    if ttl <= 0:
+        return
+    with _search_cache_lock:
+        _search_cache[key] = (time.monotonic() + ttl, [r.model_copy() for r in results])
+        _search_cache.move_to_end(key)
+        while len(_search_cache) > max_entries:
+            _search_cache.popitem(last=False)
+
+
+def _search(query: str, max_results: int = 5) -> list[SearchResult]:
+    """Search the web and return a list of SearchResult models."""
+    key = _search_key(query, max_results)
+    cached = _search_cache_get(key)
+    if cached is not None:
+        return cached
+
+    results = _ddgs_search(query, max_results)
+    _search_cache_put(key, results)
+    return results
+
+
+async def _asearch(query: str, max_results: int = 5) -> list[SearchResult]:
+    """
+    Async version of `_search`.
+
+    Concurrent calls for the same normalized query share one DDGS request.
+    """
+    key = _search_key(query, max_results)
+    with span("search", kind="search", query=query, max_results=max_results) as s:
+        cached = _search_cache_get(key)
+        if cached is not None:
+            if s:
+                s.set(cache_hit=True, results=len(cached))
+            return cached
+
+        async def run() -> list[SearchResult]:
+            results = await asyncio.to_thread(_ddgs_search, query, max_results)
+            _search_cache_put(key, results)
+            return results
+
+        shared = _search_flight.in_flight(key)
+        results = await _search_flight.do(key, run)
+        if s:
+            s.set(cache_hit=False, shared=shared, results=len(results))
+        return [r.model_copy() for r in results]
+
+
+def _fetch_max_bytes() -> int:
+    """Return the per-page body byte cap."""
+    return int(os.getenv("FETCH_MAX_BYTES", str(DEFAULT_FETCH_MAX_BYTES)))
+
+
+def _media_type(response) -> str | None:
+    """Return the response's media type without parameters, lowercased."""
+    content_type = response.headers.get("content-type")
+    if not content_type:
+        return None
+    return content_type.split(";", 1)[0].strip().lower()
+
+
+def _check_media_type(url: str, media_type: str | None) -> None:
+    """Reject responses that are neither HTML nor text before reading their body."""
+    if media_type is None or media_type.startswith("text/") or media_type in MARKUP_MEDIA_TYPES:
+        return
+    raise UnsupportedContentTypeError(f"Skipped {url}: unsupported content type '{media_type}'")
+
+
+def _truncation_info(response, bytes_read: int, truncated: bool) -> dict:
+    """Describe how much of the body was skipped, using Content-Length when it is meaningful."""
+    bytes_truncated = 0 if not truncated else None
+    content_length = response.headers.get("content-length")
+    # Content-Length counts encoded bytes; it only matches the decoded body when uncompressed
+    if truncated and content_length and content_length.isdigit() and not response.headers.get("content-encoding"):
+        bytes_truncated = max(0, int(content_length) - bytes_read)
+    return {"bytes_read": bytes_read, "truncated": truncated, "bytes_truncated": bytes_truncated}
+
+
+def _page_text(body: bytes, encoding: str | None, media_type: str | None) -> str:
+    """Decode a (possibly truncated) body and extract its text as markdown."""
+    text = body.decode(encoding or "utf-8", errors="replace")
+    if media_type is None or "html" in media_type or "xml" in media_type:
+        return extract_markdown(text)
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    return "\n\n".join(lines)
+
+
 def _fetch(url: str) -> FetchResult:
-    """Fetch a webpage and return its main content as a FetchResult model."""
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
-    response = httpx.get(url, headers=headers, follow_redirects=True, timeout=15)
-    response.raise_for_status()
+    """
+    Fetch a webpage and return its main content as a FetchResult model.
+
+    Served from the page cache while fresh; stale entries are revalidated with
+    a conditional GET so unchanged pages skip both download and parsing.
+    The body is streamed: non-text responses are rejected from their headers,
+    and reading stops at FETCH_MAX_BYTES, parsing whatever arrived.
+    """
+    cache = get_page_cache()
+    cached = cache.get(url) if cache else None
+    if cached and cached.is_fresh(cache.ttl):
+        return FetchResult(url=url, content=cached.content, **cached.metadata)
+
+    headers = cached.revalidation_headers() if cached else None
+    limit = _fetch_max_bytes()
+
+    with get_sync_client().stream("GET", url, headers=headers) as response:
+        if cached and response.status_code == 304:
+            cache.mark_revalidated(url)
+            return FetchResult(url=url, content=cached.content, **cached.metadata)
+        response.raise_for_status()
+
+        media_type = _media_type(response)
+        _check_media_type(url, media_type)
+
+        body = bytearray()
+        truncated = False
+        for chunk in response.iter_bytes():
+            body.extend(chunk)
+            if len(body) > limit:
+                truncated = True
+                del body[limit:]
+                break
+
+        metadata = {"content_type": media_type, **_truncation_info(response, len(body), truncated)}
+        encoding = response.charset_encoding
 
-    soup = BeautifulSoup(response.text, "html.parser")
+    content = _page_text(bytes(body), encoding, media_type)
+    if cache:
+        cache.put(url, content, response.headers.get("etag"), response.headers.get("last-modified"), metadata)
+    return FetchResult(url=url, content=content, **metadata)
 
-    for tag in soup(["script", "style", "nav", "header", "footer", "aside", "form", "iframe"]):
-        tag.decompose()
 
-    main_content = (
-        soup.find("main")
-        or soup.find("article")
-        or soup.find("div", {"class": "content"})
-        or soup.find("body")
-    )
+async def _afetch(url: str) -> FetchResult:
+    """
+    Async version of `_fetch` that uses the shared pooled AsyncClient.
 
-    if main_content:
-        md = markdownify(str(main_content), heading_style="ATX", strip=["a"])
-        lines = [line.strip() for line in md.splitlines() if line.strip()]
-        return FetchResult(url=url, content="\n\n".join(lines))
+    Inside a research run, concurrent and repeated fetches of the same URL
+    are served by a single download (see `RunContext.dedup_fetch`).
+    """
+    with span("fetch", kind="fetch", url=url) as s:
+        run = current_run()
+        if run is None:
+            return await _afetch_page(url)
+        if s:
+            key = canonicalize_url(url)
+            s.set(deduplicated=key in run.fetched or run.fetch_flight.in_flight(key))
+        result = await run.dedup_fetch(url, lambda: _afetch_page(url))
+        return result.model_copy(update={"url": url})
 
-    return FetchResult(url=url, content="")
 
+async def _afetch_page(url: str) -> FetchResult:
+    """Fetch one page through the page cache and the shared AsyncClient."""
+    s = current_span()
+    cache = get_page_cache()
+    # SQLite queries and zlib of whole pages would block the event loop
+    cached = await asyncio.to_thread(cache.get, url) if cache else None
+    if cached and cached.is_fresh(cache.ttl):
+        if s:
+            s.set(cache="hit", bytes_read=cached.metadata.get("bytes_read"))
+        return FetchResult(url=url, content=cached.content, **cached.metadata)
 
-def _search_and_fetch(query: str, max_results: int = 3) -> list[SearchResult]:
-    """Search and fetch content from top results."""
+    headers = cached.revalidation_headers() if cached else None
+    limit = _fetch_max_bytes()
+
+    async with get_async_client().stream("GET", url, headers=headers) as response:
+        if s:
+            s.set(status_code=response.status_code, http_version=response.http_version)
+        if cached and response.status_code == 304:
+            await asyncio.to_thread(cache.mark_revalidated, url)
+            if s:
+                s.set(cache="revalidated", bytes_read=0)
+            return FetchResult(url=url, content=cached.content, **cached.metadata)
+        response.raise_for_status()
+
+        media_type = _media_type(response)
+        _check_media_type(url, media_type)
+
+        body = bytearray()
+        truncated = False
+        async for chunk in response.aiter_bytes():
+            body.extend(chunk)
+            if len(body) > limit:
+                truncated = True
+                del body[limit:]
+                break
+
+        metadata = {"content_type": media_type, **_truncation_info(response, len(body), truncated)}
+        encoding = response.charset_encoding
+
+    # Parsing is CPU-bound; keep it off the event loop
+    parse_started = time.perf_counter()
+    content = await asyncio.to_thread(_page_text, bytes(body), encoding, media_type)
+    if s:
+        s.set(
+            cache="miss", content_type=media_type, bytes_read=metadata["bytes_read"],
+            truncated=metadata["truncated"], parse_ms=round((time.perf_counter() - parse_started) * 1000, 3),
+        )
+    if cache:
+        await asyncio.to_thread(
+            cache.put, url, content, response.headers.get("etag"), response.headers.get("last-modified"), metadata
+        )
+    return FetchResult(url=url, content=content, **metadata)
+
+
+def _search_and_fetch(
+    query: str,
+    max_results: int = 3,
+    deadline: float = SEARCH_AND_FETCH_DEADLINE,
+) -> list[SearchResult]:
+    """
+    Search and fetch content from top results.
+
+    Result pages are fetched concurrently. Any page that has not arrived when
+    `deadline` seconds have passed is left snippet-only (content is None).
+    """
     results = _search(query, max_results)
-    for result in results:
+    if not results:
+        return results
+
+    executor = ThreadPoolExecutor(max_workers=len(results))
+    try:
+        futures = {executor.submit(_fetch, result.url): result for result in results}
+        done, _ = wait(futures, timeout=deadline)
+        for future, result in futures.items():
+            if future not in done:
+                continue
+            try:
+                fetched = future.result()
+                result.content = fetched.content
+                result.truncated = fetched.truncated
+                result.bytes_truncated = fetched.bytes_truncated
+            except Exception as e:
+                result.content = f"Failed to fetch: {e}"
+    finally:
+        # Don't block on stragglers; they finish (or time out) in the background
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+async def _asearch_and_fetch(
+    query: str,
+    max_results: int = 3,
+    deadline: float = SEARCH_AND_FETCH_DEADLINE,
+) -> list[SearchResult]:
+    """Async version of `_search_and_fetch`; stragglers are cancelled at the deadline."""
+    results = await _asearch(query, max_results)
+    if not results:
+        return results
+
+    fetches = {asyncio.create_task(_afetch(result.url)): result for result in results}
+    done, pending = await asyncio.wait(fetches, timeout=deadline)
+
+    for task in pending:
+        task.cancel()
+
+    for task, result in fetches.items():
+        if task not in done:
+            continue
         try:
-            fetched = _fetch(result.url)
+            fetched = task.result()
             result.content = fetched.content
+            result.truncated = fetched.truncated
+            result.bytes_truncated = fetched.bytes_truncated
         except Exception as e:
             result.content = f"Failed to fetch: {e}"
-    return results
\ No newline at end of file
+    return results
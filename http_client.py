@@ -0,0 +1,166 @@
+"""
+Process-wide pooled HTTP clients.
+
+A single client per process keeps TCP/TLS connections alive between requests,
+so repeated requests to the same hosts skip DNS, connect and handshake costs.
+There are two pools: one for web fetches and one for the OpenAI API, each
+configurable through environment variables:
+
+- HTTP_MAX_CONNECTIONS (default 100)
+- HTTP_MAX_KEEPALIVE_CONNECTIONS (default 20)
+- HTTP_KEEPALIVE_EXPIRY seconds (default 30)
+- OPENAI_HTTP_MAX_CONNECTIONS (default 50)
+- OPENAI_HTTP_MAX_KEEPALIVE_CONNECTIONS (default 20)
+- OPENAI_HTTP_KEEPALIVE_EXPIRY seconds (default 60)
+- HTTP2_ENABLED (default true, requires the `h2` package)
+"""
+
+import asyncio
+import os
+from typing import Callable, Optional
+
+import httpx
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+DEFAULT_TIMEOUT = 15
+
+# LLM responses can take minutes; connecting should not
+OPENAI_TIMEOUT = httpx.Timeout(600.0, connect=5.0)
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    """Read a boolean flag from the environment."""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in ("0", "false", "no", "off", "")
+
+
+def http_limits(prefix: str = "HTTP", max_connections: int = 100, max_keepalive: int = 20, keepalive_expiry: float = 30) -> httpx.Limits:
+    """Build connection pool limits from `<prefix>_*` environment variables."""
+    return httpx.Limits(
+        max_connections=int(os.getenv(f"{prefix}_MAX_CONNECTIONS", str(max_connections))),
+        max_keepalive_connections=int(os.getenv(f"{prefix}_MAX_KEEPALIVE_CONNECTIONS", str(max_keepalive))),
+        keepalive_expiry=float(os.getenv(f"{prefix}_KEEPALIVE_EXPIRY", str(keepalive_expiry))),
+    )
+
+
+def http2_enabled() -> bool:
+    """Return True if HTTP/2 is requested and the `h2` package is available."""
+    if not _env_flag("HTTP2_ENABLED", True):
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class SharedAsyncClient:
+    """
+    Lazily created AsyncClient shared by everything running in one event loop.
+
+    Connections in an httpx pool belong to the event loop that opened them,
+    so a new client is created if the running loop has changed (for example
+    after a second `asyncio.run`).
+    """
+
+    def __init__(self, factory: Callable[[], httpx.AsyncClient]):
+        self._factory = factory
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def get(self) -> httpx.AsyncClient:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if self._client is None or self._client.is_closed or (loop is not None and loop is not self._loop):
+            self._client = self._factory()
+            self._loop = loop
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+
+
+class SharedClient:
+    """Lazily created synchronous Client shared by the whole process."""
+
+    def __init__(self, factory: Callable[[], httpx.Client]):
+        self._factory = factory
+        self._client: Optional[httpx.Client] = None
+
+    def get(self) -> httpx.Client:
+        if self._client is None or self._client.is_closed:
+            self._client = self._factory()
+        return self._client
+
+    def close(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            self._client.close()
+        self._client = None
+
+
+_web_async = SharedAsyncClient(lambda: httpx.AsyncClient(
+    headers=DEFAULT_HEADERS,
+    follow_redirects=True,
+    timeout=DEFAULT_TIMEOUT,
+    limits=http_limits(),
+    http2=http2_enabled(),
+))
+
+_web_sync = SharedClient(lambda: httpx.Client(
+    headers=DEFAULT_HEADERS,
+    follow_redirects=True,
+    timeout=DEFAULT_TIMEOUT,
+    limits=http_limits(),
+    http2=http2_enabled(),
+))
+
+_openai_async = SharedAsyncClient(lambda: httpx.AsyncClient(
+    timeout=OPENAI_TIMEOUT,
+    limits=http_limits("OPENAI_HTTP", max_connections=50, keepalive_expiry=60),
+    http2=http2_enabled(),
+))
+
+_openai_sync = SharedClient(lambda: httpx.Client(
+    timeout=OPENAI_TIMEOUT,
+    limits=http_limits("OPENAI_HTTP", max_connections=50, keepalive_expiry=60),
+    http2=http2_enabled(),
+))
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the shared AsyncClient used for web fetches."""
+    return _web_async.get()
+
+
+def get_sync_client() -> httpx.Client:
+    """Return the shared synchronous Client used by the blocking fetch helpers."""
+    return _web_sync.get()
+
+
+def get_openai_async_client() -> httpx.AsyncClient:
+    """Return the shared AsyncClient that carries every OpenAI API request."""
+    return _openai_async.get()
+
+
+def get_openai_sync_client() -> httpx.Client:
+    """Return the shared synchronous Client for OpenAI API requests."""
+    return _openai_sync.get()
+
+
+async def aclose_clients() -> None:
+    """Close the shared clients. Call once before the event loop shuts down."""
+    await _web_async.aclose()
+    await _openai_async.aclose()
+    _web_sync.close()
+    _openai_sync.close()
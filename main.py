@@ -2,11 +2,19 @@
 Main entry point for the multi-agent research system.
 """
 
+import argparse
 import asyncio
-from datetime import datetime
+import json
 from pathlib import Path
+from checkpoints import get_checkpoint_store
 from models import AgentState
 from nodes.research_agent import research_graph
+from http_client import aclose_clients
+from rate_limiter import get_rate_limiter
+from report_file import REPORT_FOOTER, report_header
+from retry import retry_stats
+from run_context import run_context
+from tracing import trace_run
 
 
 
@@ -30,13 +38,69 @@ async def run_research(query: str, output_file: str = None):
 
     # Create initial state
     initial_state = AgentState(query=query)
+    print(f"Run ID: {initial_state.run_id}\n")
+
+    return await _run_graph(initial_state, output_file)
+
+
+async def resume(run_id: str, output_file: str = None):
+    """
+    Resume a research run from its last checkpoint.
+
+    The graph continues with the node after the last one that succeeded.
+    Worker tasks that completed before the run stopped keep their results
+    and are not run again. Token and cost figures cover the resumed part.
+
+    Args:
+        run_id: The run ID printed when the run started
+        output_file: Optional path to save the markdown report
+
+    Returns:
+        The final AgentState with the completed research report
+    """
+    store = get_checkpoint_store()
+    if store is None:
+        raise ValueError("Checkpointing is disabled (CHECKPOINT_ENABLED=false); nothing to resume")
+    state = store.load(run_id)
+    if state is None:
+        raise ValueError(f"No checkpoint found for run {run_id}")
+
+    restored = sum(
+        1 for phase in (state.plan.phases if state.plan else []) for t in phase.worker_tasks if t.status == "completed"
+    )
+    print("=" * 80)
+    print("MULTI-AGENT RESEARCH SYSTEM (RESUMING)")
+    print("=" * 80)
+    print(f"\nRun ID: {run_id}\nQuery: {state.query}\nResuming at: {state.status} ({restored} completed task(s) restored)\n")
+    print("=" * 80)
+
+    return await _run_graph(state, output_file)
+
+
+async def _run_graph(initial_state: AgentState, output_file: str = None):
+    """Run the research graph from `initial_state`, then report and save the results."""
+    query = initial_state.query
+    store = get_checkpoint_store()
+
+    # Synthesis streams the report to stdout and, header first, to the report file
+    initial_state.context.update(stream_report=True, output_file=output_file)
+    initial_state.context.pop("report_file", None)
 
     # Run the research graph
     try:
-        result = await research_graph.ainvoke(initial_state)
+        # Run-scoped resources (e.g. fetch deduplication) shared by all nodes and workers
+        try:
+            with run_context(initial_state.run_id) as run, trace_run(run.run_id, query=query):
+                result = await research_graph.ainvoke(initial_state)
+        finally:
+            if store is not None:
+                # Make the checkpoints durable before reporting
+                await asyncio.to_thread(store.flush)
 
         # LangGraph returns a dict, so we need to access values via keys
         final_state = result if isinstance(result, AgentState) else AgentState(**result)
+        final_state.usage = run.usage.to_dict()
+        final_state.total_tokens_used = run.usage.totals.total_tokens
 
         print("\n" + "=" * 80)
         print("RESEARCH COMPLETE")
@@ -45,19 +109,40 @@ async def run_research(query: str, output_file: str = None):
         # Display status
         print(f"\nStatus: {final_state.status}")
         print(f"Planning Iterations: {final_state.planning_iteration}")
+        print(f"Fetches: {run.fetch_requests} requested, {run.fetches_deduplicated} deduplicated")
+        limits = get_rate_limiter().metrics()
+        print(
+            f"LLM calls: {limits['calls']} ({limits['actual_tokens']} tokens, "
+            f"{limits['waits']} queued for the rate limit, {limits['seconds_waited']:.1f}s waiting)"
+        )
+        for name, stats in retry_stats().items():
+            print(
+                f"Retries ({name}): {stats['retries']} retried, {stats['gave_up']} gave up, "
+                f"{stats['seconds_sleeping']:.1f}s backing off"
+            )
+
+        print(f"Tool calls: {final_state.total_tool_calls}")
+        print(f"\nCost and latency:\n{run.usage.format_breakdown()}")
+        usage_file = save_usage_to_file(final_state, output_file)
+        print(f"Usage breakdown saved to: {usage_file}")
 
         if final_state.errors:
             print(f"\nErrors encountered: {len(final_state.errors)}")
             for error in final_state.errors:
                 print(f"  - {error}")
+        if final_state.status == "failed" and store is not None:
+            print(f"\nResume with: python main.py --resume {final_state.run_id}")
 
-        # Save to file if specified
+        # Save to file if specified (unless synthesis already streamed it there)
         if output_file and final_state.final_report:
-            save_report_to_file(final_state.final_report, output_file, query)
+            if final_state.context.get("report_file") != output_file:
+                save_report_to_file(final_state.final_report, output_file, query)
             print(f"\nReport saved to: {output_file}")
 
-        # Display the report
-        if final_state.final_report:
+        # Display the report, unless synthesis ran in this invocation and streamed it
+        if final_state.final_report and "synthesis" in run.usage.breakdown["node"]:
+            print("\nFinal report streamed above.")
+        elif final_state.final_report:
             print("\n" + "=" * 80)
             print("FINAL REPORT")
             print("=" * 80)
@@ -69,6 +154,8 @@ async def run_research(query: str, output_file: str = None):
 
     except Exception as e:
         print(f"\n❌ Research failed with error: {e}")
+        if store is not None:
+            print(f"Resume with: python main.py --resume {initial_state.run_id}")
         raise
 
 
@@ -85,37 +172,41 @@ def save_report_to_file(report: str, output_file: str, query: str):
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
     # Create the full markdown document with metadata
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    markdown_content = f"""---
-title: Research Report
-query: {query}
-generated: {timestamp}
-system: Multi-Agent Research System
----
-
-# Research Report
-
-**Query:** {query}
-
-**Generated:** {timestamp}
-
----
-
-{report}
-
----
-
-*This report was generated by the Multi-Agent Research System*
-"""
+    markdown_content = report_header(query) + report + REPORT_FOOTER
 
     # Write to file
     with open(output_path, 'w', encoding='utf-8') as f:
         f.write(markdown_content)
 
 
-async def main():
-    """Main execution function."""
+def save_usage_to_file(state: AgentState, output_file: str = None) -> Path:
+    """
+    Save the run's token, cost and latency breakdown as JSON.
+
+    It is written next to the report (`<report>.usage.json`), or to
+    `reports/usage_<run_id>.json` when there is no report file.
+    """
+    if output_file:
+        usage_path = Path(output_file).with_suffix(".usage.json")
+    else:
+        usage_path = Path("reports") / f"usage_{state.run_id}.json"
+    usage_path.parent.mkdir(parents=True, exist_ok=True)
+
+    document = {
+        "run_id": state.run_id,
+        "query": state.query,
+        "status": state.status,
+        "total_tokens_used": state.total_tokens_used,
+        "total_tool_calls": state.total_tool_calls,
+        **state.usage,
+    }
+    with open(usage_path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, indent=2)
+    return usage_path
+
+
+async def main(resume_run_id: str = None):
+    """Main execution function; resumes `resume_run_id` instead of starting a new run if given."""
 
     # Define the research query
     query = """Analyze the current state of AI safety research. I want to understand:
@@ -131,9 +222,20 @@ Generate a comprehensive report with citations."""
     output_file = "reports/ai_safety_research_report.md"
 
     # Run the research
-    await run_research(query, output_file)
+    try:
+        if resume_run_id:
+            await resume(resume_run_id, output_file)
+        else:
+            await run_research(query, output_file)
+    finally:
+        # Release pooled HTTP connections before the event loop closes
+        await aclose_clients()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the multi-agent research system.")
+    parser.add_argument("--resume", metavar="RUN_ID", help="Resume a stopped or failed run from its last checkpoint")
+    args = parser.parse_args()
+
     # Run the async main function
-    asyncio.run(main())
+    asyncio.run(main(args.resume))
@@ -1,4 +1,5 @@
-from typing import List, Optional, Dict, Any
+import uuid
+from typing import List, Optional, Dict, Any, Tuple
 from pydantic import BaseModel, Field
 
 
@@ -32,6 +33,11 @@ class WorkerTask(BaseModel):
         description="Whether this worker requires web search functionality"
     )
 
+    depends_on: Optional[List[str]] = Field(
+        default=None,
+        description="task_ids from earlier phases whose results this task needs. Null waits for every task in the previous phase; an empty list starts immediately"
+    )
+
     temperature: float = Field(
         default=0.0,
         ge=0.0,
@@ -63,6 +69,21 @@ class WorkerTask(BaseModel):
         description="Number of tool calls made by this worker"
     )
 
+    context_stats: Dict[str, int] = Field(
+        default_factory=dict,
+        description="Prompt token counters from the worker loop (prompt_tokens, peak_prompt_tokens, compactions, tokens_saved, ...)"
+    )
+
+    tool_stats: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Tool execution timings (batches, calls, wall_seconds, sequential_seconds, seconds_saved)"
+    )
+
+    elapsed_seconds: float = Field(
+        default=0.0,
+        description="Wall-clock seconds the worker ran"
+    )
+
 
 class ExecutionPhase(BaseModel):
     """A sequential phase containing parallel worker tasks."""
@@ -96,7 +117,12 @@ class ExecutionPhase(BaseModel):
 
 
 class ExecutionPlan(BaseModel):
-    """Multi-agent execution plan with sequential phases of parallel worker tasks."""
+    """
+    Multi-agent execution plan with sequential phases of parallel worker tasks.
+
+    Tasks run as a dependency graph: each starts once the tasks it depends on
+    have finished. Phases group the tasks and give the default dependencies.
+    """
 
     summary: str = Field(
         description="Overview of the plan's objectives"
@@ -115,6 +141,36 @@ class ExecutionPlan(BaseModel):
         description="Whether additional research iterations are needed after plan completion"
     )
 
+    def task_dependencies(self) -> Dict[Tuple[int, int], List[Tuple[int, int]]]:
+        """
+        Resolve each task's dependencies as (phase index, task index) positions.
+
+        `depends_on` may only name tasks in earlier phases, which keeps the
+        graph acyclic and the phase order a valid execution order. Unknown
+        or forward references are ignored. When a task_id is repeated, the
+        latest earlier task with that id is used. Tasks without `depends_on`
+        wait for every task in the previous phase.
+        """
+        dependencies: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        earlier: Dict[str, Tuple[int, int]] = {}
+        previous_phase: List[Tuple[int, int]] = []
+
+        for phase_idx, phase in enumerate(self.phases):
+            positions = [(phase_idx, task_idx) for task_idx in range(len(phase.worker_tasks))]
+            for position, task in zip(positions, phase.worker_tasks):
+                if task.depends_on is None:
+                    dependencies[position] = list(previous_phase)
+                else:
+                    dependencies[position] = [
+                        earlier[task_id] for task_id in dict.fromkeys(task.depends_on) if task_id in earlier
+                    ]
+
+            for position, task in zip(positions, phase.worker_tasks):
+                earlier[task.task_id] = position
+            previous_phase = positions
+
+        return dependencies
+
 
 class EvaluationResult(BaseModel):
     """Results from the evaluation phase."""
@@ -148,6 +204,11 @@ class AgentState(BaseModel):
     """
 
     # ==================== INPUT ====================
+    run_id: str = Field(
+        default_factory=lambda: uuid.uuid4().hex[:12],
+        description="Unique identifier for this research run"
+    )
+
     query: str = Field(
         description="The user's research query"
     )
@@ -220,5 +281,10 @@ class AgentState(BaseModel):
     
     total_tokens_used: int = Field(
         default=0,
-        description="Total tokens used (if tracking)"
+        description="Total LLM tokens used across all nodes and workers"
+    )
+
+    usage: Dict[str, Any] = Field(
+        default_factory=dict,
+        description="Token, cost and latency breakdown by node, phase and task (see usage.UsageLedger.to_dict)"
     )
\ No newline at end of file
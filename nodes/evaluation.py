@@ -5,7 +5,7 @@ Evaluation node for assessing research completeness and identifying gaps.
 from typing import List
 from models import AgentState, EvaluationResult, ExecutionPlan
 from prompts import EVALUATION_AGENT_SYSTEM_PROMPT
-from utils import get_llm
+from utils import ainvoke_llm, get_llm
 from langchain_core.messages import SystemMessage, HumanMessage
 
 
@@ -69,7 +69,7 @@ async def evaluate_research_completeness(
 ) -> EvaluationResult:
     """Evaluate if the research plan has sufficient information."""
 
-    structured_llm = llm.with_structured_output(EvaluationResult)
+    structured_llm = llm.with_structured_output(EvaluationResult, include_raw=True)
 
     # Collect all worker outputs
     all_outputs = []
@@ -123,7 +123,7 @@ Provide your evaluation with specific missing_aspects if incomplete, or confirm
         HumanMessage(content=evaluation_prompt)
     ]
 
-    evaluation = await structured_llm.ainvoke(messages)
+    evaluation = await ainvoke_llm(structured_llm, messages)
     return evaluation
 
 
@@ -3,45 +3,65 @@ Execution node for carrying out tasks based on the execution plan.
 """
 
 import asyncio
-import random
-from models import AgentState
-from nodes.worker_agent import create_worker_graph, WorkerAgentState
-
-# Maximum number of workers executing concurrently
-CONCURRENT_WORKER_LIMIT = 3
+import time
+from typing import Callable, Optional, Tuple
+from checkpoints import get_checkpoint_store
+from concurrency import get_worker_limiter
+from models import AgentState, ExecutionPhase, ExecutionPlan, WorkerTask
+from nodes.worker_agent import get_worker_graph, WorkerAgentState
+from progress import emit
+from run_context import current_run, ensure_run_context
+from tracing import end_span, span, start_span
+from upstream_digest import build_upstream_digest, digest_enabled
+from usage import usage_scope
 
 
 async def execution_node(state: AgentState) -> AgentState:
     """
     Execution node that carries out the tasks defined in the execution plan.
-    Executes phases sequentially, but workers within each phase run in parallel.
+    Each worker starts as soon as the tasks it depends on have finished, so
+    a slow worker only delays the tasks that need its results. Completed
+    tasks are checkpointed as they finish; tasks restored from a checkpoint
+    are not run again.
     """
     print(f"\n{'='*80}\nEXECUTION NODE\n{'='*80}\nTotal phases to execute: {len(state.plan.phases)}\n")
 
     try:
-        # Execute each phase sequentially
-        for phase_idx, phase in enumerate(state.plan.phases, 1):
-            print(f"\nExecuting Phase {phase_idx}/{len(state.plan.phases)}: {phase.name}")
-            phase.status = "in_progress"
-            
-            # Execute all worker tasks in this phase in PARALLEL
-            await execute_phase_parallel(phase)
-            
-            # Check if any tasks failed
-            failed_tasks = [t for t in phase.worker_tasks if t.status == "failed"]
-            
-            if failed_tasks:
-                phase.status = "failed"
-                phase.error = f"{len(failed_tasks)} of {len(phase.worker_tasks)} task(s) failed"
-                for task in failed_tasks:
-                    state.errors.append(f"Task '{task.name}' ({task.task_id}) failed: {task.error}")
-            else:
-                phase.status = "completed"
-                print(f"  ✓ Phase {phase_idx} completed successfully")
-
-        # After all phases complete, move to evaluation
+        with ensure_run_context(state.run_id) as run:
+            deduplicated_before = run.fetches_deduplicated
+
+            store = get_checkpoint_store()
+            on_task_completed = None
+            if store is not None:
+                def on_task_completed(position, task):
+                    store.save_task(state.run_id, state.planning_iteration, position, task)
+
+            await execute_plan_dag(state.plan, on_task_completed)
+
+            # Phases are kept as a view over their tasks' results
+            for phase in state.plan.phases:
+                for task in phase.worker_tasks:
+                    if task.status == "failed":
+                        state.errors.append(f"Task '{task.name}' ({task.task_id}) failed: {task.error}")
+
+            tool_calls = sum(t.tool_calls_made for phase in state.plan.phases for t in phase.worker_tasks)
+            state.total_tool_calls += tool_calls
+            print(f"  Tool calls this plan: {tool_calls} (upstream digest {'on' if digest_enabled() else 'off'})")
+
+            deduplicated = run.fetches_deduplicated - deduplicated_before
+            if deduplicated:
+                print(f"  ↺ {deduplicated} duplicate fetch(es) shared between workers")
+
+            metrics = get_worker_limiter().metrics()
+            print(
+                f"  Worker concurrency limit {metrics['limit']} "
+                f"(peak queue {metrics['peak_queue_depth']}, {metrics['increases']} increase(s), "
+                f"{metrics['decreases']} decrease(s), {metrics['rate_limited']} rate limited)"
+            )
+
+        # After all tasks complete, move to evaluation
         state.status = "evaluating"
-        
+
     except Exception as e:
         state.status = "failed"
         state.errors.append(f"Execution failed: {str(e)}")
@@ -49,24 +69,150 @@ async def execution_node(state: AgentState) -> AgentState:
     return state
 
 
-async def execute_phase_parallel(phase):
-    """Execute all worker tasks in a phase with controlled concurrency."""
+async def execute_plan_dag(
+    plan: ExecutionPlan,
+    on_task_completed: Optional[Callable[[Tuple[int, int], WorkerTask], None]] = None,
+) -> None:
+    """
+    Run every worker task in the plan, each as soon as its dependencies finish.
+
+    Tasks run even if a dependency failed, as they did with phase barriers;
+    they simply see fewer upstream results. Phase status is updated as the
+    phase's first task starts and its last task finishes. Tasks that are
+    already completed (restored from a checkpoint) are skipped, and
+    `on_task_completed(position, task)` is called for each task that completes.
+    """
+    dependencies = plan.task_dependencies()
+    limiter = get_worker_limiter()
+    remaining = {phase_idx: len(phase.worker_tasks) for phase_idx, phase in enumerate(plan.phases)}
+    phase_started = {}
+    phase_spans = {}
+    finished_at = {}
+    worker_spans = {}
+    runs = {}
+    run = current_run()
+    ledger = run.usage if run else None
+
+    async def run_task(position, task: WorkerTask):
+        phase_idx = position[0]
+        phase = plan.phases[phase_idx]
+
+        if task.status == "completed":
+            finished_at[position] = time.perf_counter()
+            remaining[phase_idx] -= 1
+            if remaining[phase_idx] == 0 and phase.status == "pending":
+                _finish_phase(phase, phase_idx + 1)
+                emit("phase_finished", phase=phase.name, phase_index=phase_idx + 1, status=phase.status, restored=True)
+            return
+
+        upstream = [runs[dependency] for dependency in dependencies[position]]
+        if upstream:
+            await asyncio.wait(upstream)
+
+        if phase.status == "pending":
+            phase.status = "in_progress"
+            phase_started[phase_idx] = time.perf_counter()
+            phase_spans[phase_idx] = start_span("phase", kind="phase", phase=phase.name, phase_index=phase_idx + 1)
+            emit("phase_started", phase=phase.name, phase_index=phase_idx + 1, phases=len(plan.phases))
+            print(f"\nStarting Phase {phase_idx + 1}/{len(plan.phases)}: {phase.name}")
+
+        upstream_tasks = [plan.phases[p].worker_tasks[t] for p, t in dependencies[position]]
+
+        # The dependency that finished last is what this worker waited for
+        last_upstream = max(dependencies[position], key=lambda p: finished_at[p], default=None)
+        waited_for = worker_spans.get(last_upstream)
+
+        with span(
+            "worker", kind="worker", parent=phase_spans.get(phase_idx),
+            task=task.name, task_id=task.task_id, after=waited_for.span_id if waited_for else None,
+        ) as s, usage_scope(phase=phase.name, task=task.name):
+            worker_spans[position] = s
+            await execute_worker(task, limiter, upstream_tasks)
+            if task.status == "completed" and on_task_completed is not None:
+                on_task_completed(position, task)
+            if s:
+                s.set(
+                    status=task.status, tool_calls=task.tool_calls_made, elapsed_seconds=round(task.elapsed_seconds, 3),
+                    prompt_tokens=task.context_stats.get("prompt_tokens"),
+                )
+        finished_at[position] = time.perf_counter()
+
+        remaining[phase_idx] -= 1
+        if ledger is not None:
+            ledger.record_wall("task", task.name, task.elapsed_seconds)
+        if remaining[phase_idx] == 0:
+            if ledger is not None:
+                ledger.record_wall("phase", phase.name, time.perf_counter() - phase_started[phase_idx])
+            _finish_phase(phase, phase_idx + 1)
+            emit("phase_finished", phase=phase.name, phase_index=phase_idx + 1, status=phase.status)
+            phase_span = phase_spans.get(phase_idx)
+            if phase_span:
+                phase_span.set(status=phase.status)
+            end_span(phase_span)
+
+    # Phase order is a topological order, so upstream tasks already exist
+    for phase_idx, phase in enumerate(plan.phases):
+        if not phase.worker_tasks:
+            _finish_phase(phase, phase_idx + 1)
+        for task_idx, task in enumerate(phase.worker_tasks):
+            position = (phase_idx, task_idx)
+            runs[position] = asyncio.create_task(run_task(position, task))
+
+    restored = sum(1 for phase in plan.phases for t in phase.worker_tasks if t.status == "completed")
+    if restored:
+        print(f"  ↷ {restored} completed task(s) restored from checkpoint")
+
+    total = sum(remaining.values()) - restored
+    print(
+        f"  Scheduling {total} workers by dependency (concurrency limit {limiter.capacity}, "
+        f"{limiter.in_flight} running, {limiter.queue_depth} queued)..."
+    )
+
+    started = time.perf_counter()
+    if runs:
+        await asyncio.gather(*runs.values())
+    elapsed = time.perf_counter() - started
 
-    tasks = phase.worker_tasks
+    # With phase barriers every phase would have waited for its slowest worker
+    barrier_estimate = sum(max((t.elapsed_seconds for t in phase.worker_tasks), default=0.0) for phase in plan.phases)
+    if len(plan.phases) > 1:
+        print(f"  ⇉ All workers finished in {elapsed:.1f}s (phase barriers: ~{barrier_estimate:.1f}s)")
 
-    # Create semaphore to limit concurrent workers
-    semaphore = asyncio.Semaphore(CONCURRENT_WORKER_LIMIT)
 
-    async def execute_with_limit(task):
-        """Execute a single worker with rate limiting."""
-        async with semaphore:
-            # Add small random delay to spread out requests
-            await asyncio.sleep(random.uniform(0.1, 0.5))
+def _finish_phase(phase: ExecutionPhase, phase_number: int) -> None:
+    """Set a phase's status from its tasks once they have all finished."""
+    failed_tasks = [t for t in phase.worker_tasks if t.status == "failed"]
+    if failed_tasks:
+        phase.status = "failed"
+        phase.error = f"{len(failed_tasks)} of {len(phase.worker_tasks)} task(s) failed"
+    else:
+        phase.status = "completed"
+        print(f"  ✓ Phase {phase_number} completed successfully")
 
+
+async def execute_worker(task: WorkerTask, limiter=None, upstream: list = None) -> None:
+    """
+    Run one worker task once the concurrency limiter grants a slot, recording its result on the task.
+
+    `upstream` are the tasks it depends on; their findings and the pages
+    fetched so far in the run are summarized in the worker's prompt.
+    """
+    limiter = limiter or get_worker_limiter()
+    started = time.perf_counter()
+
+    try:
+        async with limiter.slot():
             task.status = "in_progress"
+            started = time.perf_counter()
+            emit("worker_started", task=task.name, task_id=task.task_id)
+
+            # Reuse the precompiled worker graph for this task shape
+            worker_graph = get_worker_graph(task.needs_web_search)
 
-            # Create worker graph for this task
-            worker_graph = create_worker_graph(task)
+            digest = ""
+            if digest_enabled():
+                run = current_run()
+                digest = build_upstream_digest(task, upstream or [], run.fetched.keys() if run else [])
 
             # Create initial state for worker (as dict, not Pydantic model)
             worker_state = {
@@ -75,29 +221,39 @@ async def execute_phase_parallel(phase):
                 "final_result": "",
                 "llm": None,
                 "iteration_count": 0,
-                "tool_calls_count": 0
+                "tool_calls_count": 0,
+                "context_stats": {},
+                "tool_stats": {},
+                "upstream_digest": digest
             }
 
             # Execute with recursion limit config
-            return await worker_graph.ainvoke(
+            result = await worker_graph.ainvoke(
                 worker_state,
                 config={"recursion_limit": 50}
             )
+    except Exception as e:
+        task.elapsed_seconds = time.perf_counter() - started
+        task.status = "failed"
+        task.error = str(e)
+        print(f"    ✗ Worker '{task.name}' failed: {e}")
+        emit("worker_finished", task=task.name, task_id=task.task_id, status=task.status, error=task.error,
+             seconds=round(task.elapsed_seconds, 3))
+        return
+
+    task.elapsed_seconds = time.perf_counter() - started
 
-    # Execute all workers with controlled concurrency
-    print(f"  Executing {len(tasks)} workers (max {CONCURRENT_WORKER_LIMIT} concurrent)...")
-    worker_coros = [execute_with_limit(task) for task in tasks]
-    results = await asyncio.gather(*worker_coros, return_exceptions=True)
-
-    # Process results and update tasks
-    for task, result in zip(tasks, results):
-        if isinstance(result, Exception):
-            task.status = "failed"
-            task.error = str(result)
-            print(f"    ✗ Worker '{task.name}' failed: {result}")
-        else:
-            # Extract final result and tool call count from worker state
-            task.output = result.get("final_result", "")
-            task.tool_calls_made = result.get("tool_calls_count", 0)
-            task.status = "completed"
-            print(f"    ✓ Worker '{task.name}' completed ({task.tool_calls_made} tool calls)")
\ No newline at end of file
+    # Extract final result and tool call count from worker state
+    task.output = result.get("final_result", "")
+    task.tool_calls_made = result.get("tool_calls_count", 0)
+    task.context_stats = result.get("context_stats") or {}
+    task.tool_stats = result.get("tool_stats") or {}
+    task.status = "completed"
+    emit("worker_finished", task=task.name, task_id=task.task_id, status=task.status,
+         tool_calls=task.tool_calls_made, seconds=round(task.elapsed_seconds, 3))
+    stats = task.context_stats
+    print(
+        f"    ✓ Worker '{task.name}' completed in {task.elapsed_seconds:.1f}s ({task.tool_calls_made} tool calls, "
+        f"{stats.get('prompt_tokens', 0)} prompt tokens, {stats.get('tokens_saved', 0)} saved by compaction, "
+        f"{task.tool_stats.get('seconds_saved', 0.0):.1f}s saved by parallel tools)"
+    )
@@ -4,7 +4,7 @@ Planning node for generating execution plans based on user queries.
 
 from models import AgentState, ExecutionPlan
 from prompts import PLANNING_AGENT_SYSTEM_PROMPT
-from utils import get_llm
+from utils import ainvoke_llm, get_llm
 from langchain_core.messages import SystemMessage, HumanMessage
 
 
@@ -66,7 +66,7 @@ async def generate_execution_plan(query: str, llm, gaps: list = None, total_phas
         gaps: Optional list of identified research gaps for follow-up planning
         total_phases: Number of phases already executed across all iterations
     """
-    structured_llm = llm.with_structured_output(ExecutionPlan)
+    structured_llm = llm.with_structured_output(ExecutionPlan, include_raw=True)
 
     # Calculate remaining phase budget
     remaining_phases = max(1, 10 - total_phases)
@@ -103,7 +103,7 @@ IMPORTANT CONSTRAINTS:
         HumanMessage(content=prompt)
     ]
 
-    plan = await structured_llm.ainvoke(messages)
+    plan = await ainvoke_llm(structured_llm, messages)
     return plan
 
 
@@ -2,15 +2,40 @@
 Main research agent graph that orchestrates the multi-agent research system.
 """
 
-from typing import Literal
+import time
+from typing import Awaitable, Callable, Literal
 from langgraph.graph import StateGraph, END
+from checkpoints import get_checkpoint_store
 from models import AgentState
+from progress import emit
+from run_context import current_run
+from tracing import span
+from usage import timed_scope
 from nodes.planning import planning_node
 from nodes.execution import execution_node
 from nodes.evaluation import evaluation_node
 from nodes.synthesis import synthesis_node
 
 
+# Node to start from for each status, so a resumed run picks up where it stopped
+ENTRY_NODES = {
+    "planning": "plan",
+    "executing": "execute",
+    "evaluating": "evaluate",
+    "synthesizing": "synthesize",
+}
+
+
+def route_entry(state: AgentState) -> Literal["plan", "execute", "evaluate", "synthesize", "end"]:
+    """
+    Routing function at the start of the graph.
+    - A new run has status 'planning' and starts with planning
+    - A run resumed from a checkpoint continues with the node its status calls for
+    - A completed run ends immediately
+    """
+    return ENTRY_NODES.get(state.status, "end")
+
+
 def should_continue_after_planning(state: AgentState) -> Literal["execute", "end"]:
     """
     Routing function after planning.
@@ -57,12 +82,40 @@ def should_continue_after_synthesis(_state: AgentState) -> Literal["end"]:
     return "end"
 
 
+def tracked(name: str, node: Callable[[AgentState], Awaitable[AgentState]]):
+    """
+    Wrap a node so its LLM usage, wall-clock time and trace span are attributed
+    to `name`, and checkpoint the state once it returns.
+    """
+
+    async def run(state: AgentState) -> AgentState:
+        run_ctx = current_run()
+        ledger = run_ctx.usage if run_ctx else None
+        tokens_before = ledger.totals.total_tokens if ledger else 0
+        started = time.perf_counter()
+        emit("node_started", node=name)
+        with span(f"node.{name}", kind="node") as s, timed_scope(ledger, "node", name):
+            state = await node(state)
+            if s:
+                s.set(status=state.status, tokens=(ledger.totals.total_tokens - tokens_before) if ledger else None)
+        if ledger is not None:
+            state.total_tokens_used = ledger.totals.total_tokens
+        emit("node_finished", node=name, status=state.status, seconds=round(time.perf_counter() - started, 3))
+        store = get_checkpoint_store()
+        if store is not None:
+            store.save_state(state, name)
+        return state
+
+    run.__name__ = node.__name__
+    return run
+
+
 def create_research_graph():
     """
     Create the main research agent graph.
 
     Flow:
-    1. START -> Planning Node
+    1. START -> Planning Node (or, when resuming, the node the saved status calls for)
     2. Planning -> Execution Node
     3. Execution -> Evaluation Node
     4. Evaluation -> (Synthesis if ready) OR (Planning if more research needed)
@@ -73,13 +126,22 @@ def create_research_graph():
     workflow = StateGraph(AgentState)
 
     # Add nodes
-    workflow.add_node("plan", planning_node)
-    workflow.add_node("execute", execution_node)
-    workflow.add_node("evaluate", evaluation_node)
-    workflow.add_node("synthesize", synthesis_node)
+    workflow.add_node("plan", tracked("planning", planning_node))
+    workflow.add_node("execute", tracked("execution", execution_node))
+    workflow.add_node("evaluate", tracked("evaluation", evaluation_node))
+    workflow.add_node("synthesize", tracked("synthesis", synthesis_node))
 
     # Set the entry point
-    workflow.set_entry_point("plan")
+    workflow.set_conditional_entry_point(
+        route_entry,
+        {
+            "plan": "plan",
+            "execute": "execute",
+            "evaluate": "evaluate",
+            "synthesize": "synthesize",
+            "end": END
+        }
+    )
 
     # Add edges
     workflow.add_conditional_edges(
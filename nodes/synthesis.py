@@ -1,44 +1,144 @@
 """
 Synthesis node for creating the final research report.
+
+Small runs are synthesized in a single pass, with every task's full output in
+one prompt. When that prompt would exceed SYNTHESIS_SINGLE_PASS_TOKENS,
+synthesis switches to map-reduce: a section draft is written for each phase
+concurrently, from the phase's outputs condensed to their most relevant
+passages, then one streamed call merges the drafts into the report. Every map
+and reduce prompt stays within SYNTHESIS_CALL_TOKEN_BUDGET.
+
+Configuration (environment variables):
+
+- SYNTHESIS_SINGLE_PASS_TOKENS largest single-pass prompt (default 24000)
+- SYNTHESIS_CALL_TOKEN_BUDGET prompt tokens per map or reduce call (default 12000)
 """
 
+import asyncio
+import os
+import time
+from typing import Callable, List, Optional, Tuple
 from models import AgentState
-from prompts import SYNTHESIS_AGENT_SYSTEM_PROMPT
-from utils import get_llm
-from langchain_core.messages import SystemMessage, HumanMessage
+from passages import build_query, select_passages_shared
+from progress import emit
+from prompts import SYNTHESIS_AGENT_SYSTEM_PROMPT, SYNTHESIS_SECTION_AGENT_SYSTEM_PROMPT
+from report_file import ReportWriter
+from utils import ainvoke_llm, astream_llm, count_message_tokens, count_tokens, get_llm
+from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage
 
 
 async def synthesis_node(state: AgentState) -> AgentState:
     """
     Synthesis node that creates the final research report.
+
+    The report is streamed as it is generated: to stdout when
+    `state.context["stream_report"]` is set, to the report file at
+    `state.context["output_file"]` (header first, via `<output_file>.partial`,
+    see report_file.py), and to progress subscribers as `report_chunk` events.
     """
     print(f"\n{'='*80}\nSYNTHESIS NODE\n{'='*80}")
 
     llm = get_llm(temperature=0.3)
+    echo = bool(state.context.get("stream_report"))
+    output_file = state.context.get("output_file")
+    writer = None
 
     try:
-        report = await generate_final_report(
+        writer = ReportWriter(output_file, state.query) if output_file else None
+
+        def on_text(text: str) -> None:
+            if echo:
+                print(text, end="", flush=True)
+            if writer is not None:
+                writer.write(text)
+            emit("report_chunk", text=text)
+
+        report, stats = await generate_final_report(
             query=state.query,
             plan=state.plan,
-            llm=llm
+            llm=llm,
+            on_text=on_text
         )
+        if echo:
+            print()
+        if writer is not None:
+            writer.close()
+            state.context["report_file"] = output_file
 
         state.final_report = report
         state.status = "completed"
-        print(f"✓ Report generated ({len(report)} characters)")
+        print(
+            f"✓ Report generated ({len(report)} characters, {stats['mode']}, first token after {stats['ttft_seconds']:.1f}s, "
+            f"{stats['tokens_per_second']:.1f} tokens/s)"
+        )
+        emit("report_finished", characters=len(report), **stats)
 
     except Exception as e:
         print(f"✗ Synthesis failed: {e}")
         state.status = "failed"
         state.errors.append(f"Synthesis failed: {str(e)}")
 
+    finally:
+        # Failed or cancelled: keep what was streamed next to any existing report
+        if writer is not None and not writer.closed:
+            writer.close(complete=False)
+            if writer.partial_path.exists():
+                print(f"⚠ Incomplete report kept at {writer.partial_path}")
+
     return state
 
 
-async def generate_final_report(query: str, plan, llm) -> str:
-    """Generate the final synthesized research report."""
+async def generate_final_report(
+    query: str, plan, llm, on_text: Optional[Callable[[str], None]] = None
+) -> Tuple[str, dict]:
+    """
+    Generate the final synthesized research report, streaming it to `on_text`.
+
+    Synthesizes in one pass when the full prompt fits in the single-pass
+    limit, otherwise drafts a section per phase and merges the drafts.
+
+    Returns:
+        The report, and its stream timing (see `utils.astream_llm`) plus
+        `mode`, `input_tokens` (of the single-pass prompt) and `map_seconds`
+    """
+    phases_info = collect_phase_findings(plan)
+    messages = single_pass_messages(query, plan, phases_info)
+    input_tokens = count_message_tokens(messages)
+    limit = single_pass_limit()
+
+    map_seconds = 0.0
+    if input_tokens <= limit or not phases_info:
+        mode = "single-pass"
+        print(f"→ Synthesis mode: single pass ({input_tokens:,} input tokens)")
+    else:
+        mode = "map-reduce"
+        print(
+            f"→ Synthesis mode: map-reduce ({input_tokens:,} input tokens > {limit:,}, "
+            f"{len(phases_info)} section drafts)"
+        )
+        started = time.perf_counter()
+        drafts = await draft_sections(query, phases_info, llm)
+        map_seconds = time.perf_counter() - started
+        messages = reduce_messages(query, plan, phases_info, drafts)
+        print(f"  ✓ Drafts ready in {map_seconds:.1f}s; merging ({count_message_tokens(messages):,} prompt tokens)")
+
+    response, stats = await astream_llm(llm, messages, on_text or (lambda text: None))
+    stats.update(mode=mode, input_tokens=input_tokens, map_seconds=round(map_seconds, 3))
+    return response.content, stats
+
+
+def single_pass_limit() -> int:
+    """Return the largest single-pass synthesis prompt, in tokens."""
+    return int(os.getenv("SYNTHESIS_SINGLE_PASS_TOKENS", "24000"))
+
+
+def call_token_budget() -> int:
+    """Return the prompt token budget of each map-reduce synthesis call."""
+    return int(os.getenv("SYNTHESIS_CALL_TOKEN_BUDGET", "12000"))
+
 
-    # Collect all worker outputs organized by phase
+def collect_phase_findings(plan) -> List[dict]:
+    """Collect all worker outputs organized by phase."""
     phases_info = []
     for phase in plan.phases:
         phase_outputs = []
@@ -56,7 +156,11 @@ async def generate_final_report(query: str, plan, llm) -> str:
                 'phase_description': phase.description,
                 'tasks': phase_outputs
             })
+    return phases_info
 
+
+def single_pass_messages(query: str, plan, phases_info: List[dict]) -> List[BaseMessage]:
+    """Prompt that synthesizes the report directly from every task output."""
     synthesis_prompt = f"""
 # Research Query
 {query}
@@ -87,13 +191,148 @@ The report should be:
 Write the final research report now.
 """
 
-    messages = [
+    return [
         SystemMessage(content=SYNTHESIS_AGENT_SYSTEM_PROMPT),
         HumanMessage(content=synthesis_prompt)
     ]
 
-    response = await llm.ainvoke(messages)
-    return response.content
+
+async def draft_sections(query: str, phases_info: List[dict], llm) -> List[str]:
+    """
+    Draft one report section per phase, concurrently (the map step).
+
+    A phase whose draft fails contributes its condensed findings instead, so
+    the merge still sees its evidence.
+    """
+    budget = call_token_budget()
+    findings = [condense_phase_findings(query, phase, budget) for phase in phases_info]
+
+    async def draft(phase: dict, phase_findings: str) -> str:
+        response = await ainvoke_llm(llm, section_messages(query, phase, phase_findings))
+        return response.content
+
+    results = await asyncio.gather(
+        *(draft(phase, phase_findings) for phase, phase_findings in zip(phases_info, findings)),
+        return_exceptions=True
+    )
+
+    drafts = []
+    for phase, phase_findings, result in zip(phases_info, findings, results):
+        if isinstance(result, Exception):
+            print(f"  ⚠ Section draft for '{phase['phase_name']}' failed ({result}); merging its findings instead")
+            drafts.append(phase_findings)
+            emit("section_drafted", phase=phase['phase_name'], ok=False)
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            print(f"  ✓ Drafted section for '{phase['phase_name']}'")
+            drafts.append(result)
+            emit("section_drafted", phase=phase['phase_name'], ok=True)
+    return drafts
+
+
+def condense_phase_findings(query: str, phase: dict, budget: int) -> str:
+    """
+    Format one phase's task outputs for its section draft within `budget`.
+
+    The budget left after the rest of the prompt is shared by all the tasks'
+    outputs: if they do not fit, the passages least relevant to the query and
+    the phase are dropped first, whichever task they come from.
+    """
+    headers = [f"### {task['task_name']}\n*{task['description']}*\n" for task in phase['tasks']]
+    contents = select_passages_shared(
+        [task['output'] for task in phase['tasks']],
+        build_query(f"{query} {phase['phase_description']}"),
+        budget - count_message_tokens(section_messages(query, phase, "")) - _sections_overhead(headers),
+    )
+    return "\n".join(f"{header}\n{content}\n" for header, (content, _, _) in zip(headers, contents))
+
+
+def _sections_overhead(headers: List[str]) -> int:
+    """Tokens of the headers and separators around the condensed contents."""
+    return sum(count_tokens(f"{header}\n\n\n") for header in headers)
+
+
+def section_messages(query: str, phase: dict, findings: str) -> List[BaseMessage]:
+    """Prompt that drafts the report section for one phase."""
+    section_prompt = f"""
+# Research Query
+{query}
+
+# Research Phase: {phase['phase_name']}
+**Purpose:** {phase['phase_description']}
+
+# Phase Findings
+
+{findings}
+
+# Your Task
+Write the draft report section for this phase. Synthesize the findings above,
+keep the evidence and source URLs that support each point, and note any
+contradictions or gaps. Write the section now.
+"""
+
+    return [
+        SystemMessage(content=SYNTHESIS_SECTION_AGENT_SYSTEM_PROMPT),
+        HumanMessage(content=section_prompt)
+    ]
+
+
+def reduce_messages(query: str, plan, phases_info: List[dict], drafts: List[str]) -> List[BaseMessage]:
+    """
+    Prompt that merges the phase section drafts into the report (the reduce step).
+
+    If the drafts do not fit in the call budget together, the passages least
+    relevant to the query are dropped first, whichever draft they come from.
+    """
+    headers = [f"## Phase: {phase['phase_name']}\n" for phase in phases_info]
+    contents = select_passages_shared(
+        drafts,
+        build_query(query),
+        call_token_budget() - count_message_tokens(merge_messages(query, plan, "")) - _sections_overhead(headers),
+    )
+    return merge_messages(
+        query, plan, "\n".join(f"{header}\n{content}\n" for header, (content, _, _) in zip(headers, contents))
+    )
+
+
+def merge_messages(query: str, plan, drafts: str) -> List[BaseMessage]:
+    """Prompt for the reduce step, given the formatted section drafts."""
+    merge_prompt = f"""
+# Research Query
+{query}
+
+# Research Strategy
+{plan.strategy_rationale}
+
+# Section Drafts
+Each research phase's findings have already been synthesized into a draft section.
+
+{drafts}
+
+# Your Task
+Merge these section drafts into one comprehensive, well-structured research report that:
+
+1. **Synthesizes all sections** into a coherent narrative
+2. **Addresses the original query** completely and thoroughly
+3. **Provides clear insights** and actionable information
+4. **Keeps the source citations** from the drafts
+5. **Organizes information** logically with clear sections
+
+The report should be:
+- Professional and well-formatted (use markdown)
+- Comprehensive yet concise
+- Evidence-based with proper attribution
+- Structured with clear headings and sections, not one section per phase
+- Free of redundancy between the drafts
+
+Write the final research report now.
+"""
+
+    return [
+        SystemMessage(content=SYNTHESIS_AGENT_SYSTEM_PROMPT),
+        HumanMessage(content=merge_prompt)
+    ]
 
 
 def format_phases_for_synthesis(phases_info: list) -> str:
@@ -4,14 +4,25 @@ Worker agent node for executing individual tasks within the execution plan.
 
 from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field
-from typing import List, Optional, Literal
+import asyncio
+import time
+from functools import lru_cache
+from typing import List, Optional, Literal, Tuple, TypedDict
 from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, ToolMessage
 from langgraph.graph import StateGraph, END
 
+from concurrency import get_worker_limiter
+from context_window import new_context_stats, prepare_worker_context
 from models import WorkerTask
+from passages import condense_tool_result
 from prompts import WORKER_AGENT_SYSTEM_PROMPT
-from tools import get_all_tools
-from utils import get_llm
+from retry import call_with_retry, tool_retry_policy
+from tracing import span
+from tools import get_all_tools, get_tools_by_name
+from utils import ainvoke_llm, get_llm
+
+# Maximum tool calls from one LLM turn executing concurrently per worker
+TOOL_CONCURRENCY_LIMIT = 4
 
 
 class WorkerAgentState(BaseModel):
@@ -48,16 +59,21 @@ async def init_node(state: dict) -> dict:
     """
     task = state["task"]
     print(f"      → Starting worker: {task.name}")
-    tools = []
-    if task.needs_web_search:
-        tools = get_all_tools()
-    state["llm"] = get_llm(temperature=task.temperature).bind_tools(tools)
+    state["llm"] = get_worker_llm(task.temperature, task.needs_web_search)
     msg = await _create_prompt(state)
     state["messages"].extend(msg)
     state["iteration_count"] = 0
     state["tool_calls_count"] = 0
+    state["context_stats"] = new_context_stats()
+    state["tool_stats"] = new_tool_stats()
     return state
 
+def get_worker_llm(temperature: float, needs_web_search: bool):
+    """Return the shared worker LLM with the tool schemas bound (cached by `get_llm`)."""
+    tools = get_all_tools() if needs_web_search else []
+    return get_llm(temperature=temperature, tools=tools)
+
+
 async def _create_prompt(state: dict) -> List[BaseMessage]:
     """Create the prompt for the worker agent based on the task."""
     task = state["task"]
@@ -70,11 +86,14 @@ You are assigned the following task:
 Expected output format:
 {task.expected_output}
 """
+    # Findings of the tasks this one depends on, and pages already fetched
+    digest = state.get("upstream_digest")
+    if digest:
+        task_prompt = f"{task_prompt}\n{digest}\n"
     return [base_prompt, HumanMessage(content=task_prompt)]
 
 async def execute_task(state: dict) -> dict:
     """Execute the LLM and update state with the response"""
-    import asyncio
     from openai import RateLimitError, APIError
 
     # Increment iteration count
@@ -86,42 +105,28 @@ async def execute_task(state: dict) -> dict:
         state["final_result"] = "Maximum iterations reached. Using accumulated information."
         return state
 
-    # Retry logic for rate limits
-    max_retries = 3
-    retry_delay = 2
-
-    for attempt in range(max_retries):
-        try:
-            response = await state["llm"].ainvoke(state["messages"])
-            state["messages"].append(response)
-
-            # If no tool calls, this is the final answer
-            if not response.tool_calls:
-                state["final_result"] = response.content
-
-            return state
-        except RateLimitError as e:
-            if "Request too large" in str(e):
-                # Token limit exceeded - summarize conversation
-                state["final_result"] = "Response size limit exceeded. Unable to complete task with current context."
-                return state
-            elif attempt < max_retries - 1:
-                # Rate limit - wait and retry
-                await asyncio.sleep(retry_delay * (attempt + 1))
-            else:
-                # Max retries reached
-                state["final_result"] = f"Rate limit error after {max_retries} attempts: {str(e)}"
-                return state
-        except APIError as e:
-            if attempt < max_retries - 1:
-                await asyncio.sleep(retry_delay)
-            else:
-                state["final_result"] = f"API error: {str(e)}"
-                return state
-        except Exception as e:
-            # Unexpected error
-            state["final_result"] = f"Unexpected error: {str(e)}"
-            return state
+    # Keep the prompt within the token budget by condensing old tool results
+    prepare_worker_context(state)
+
+    # Transient errors are retried inside ainvoke_llm; anything raised here is final
+    try:
+        response = await ainvoke_llm(state["llm"], state["messages"], feedback=get_worker_limiter())
+        state["messages"].append(response)
+
+        # If no tool calls, this is the final answer
+        if not response.tool_calls:
+            state["final_result"] = response.content
+    except RateLimitError as e:
+        if "Request too large" in str(e):
+            # Token limit exceeded - summarize conversation
+            state["final_result"] = "Response size limit exceeded. Unable to complete task with current context."
+        else:
+            state["final_result"] = f"Rate limit error after retries: {str(e)}"
+    except APIError as e:
+        state["final_result"] = f"API error: {str(e)}"
+    except Exception as e:
+        # Unexpected error
+        state["final_result"] = f"Unexpected error: {str(e)}"
 
     return state
 
@@ -158,69 +163,113 @@ async def execute_tools(state: dict) -> dict:
     if not tool_calls:
         return state
 
-    # Get the tools
-    tools = get_all_tools()
-    tools_by_name = {tool.name: tool for tool in tools}
+    # Shared tool registry
+    tools_by_name = get_tools_by_name()
 
     # Track how many tool calls we're making
     num_calls = len(tool_calls)
     state["tool_calls_count"] = state.get("tool_calls_count", 0) + num_calls
 
-    # Execute each tool call and create tool messages
-    tool_messages = []
-    for tool_call in tool_calls:
+    # Tool calls from one LLM turn run concurrently, capped per worker
+    semaphore = asyncio.Semaphore(TOOL_CONCURRENCY_LIMIT)
+
+    async def run_tool_call(tool_call) -> Tuple[ToolMessage, float]:
+        """Execute one tool call and return its message with the time it took."""
         tool_name = tool_call["name"]
         tool_args = tool_call["args"]
         tool_id = tool_call["id"]
 
-        if tool_name in tools_by_name:
+        if tool_name not in tools_by_name:
+            # Every tool call needs a reply, or the next LLM call is rejected
+            return ToolMessage(content=f"Error: unknown tool: {tool_name}", tool_call_id=tool_id), 0.0
+
+        async with semaphore:
+            started = time.perf_counter()
             try:
-                # Execute the tool
-                result = await tools_by_name[tool_name].ainvoke(tool_args)
+                # Execute the tool, retrying transient network errors
+                traced_args = {k: v for k, v in tool_args.items() if k in ("query", "url", "max_results")}
+                with span(f"tool.{tool_name}", kind="tool", **traced_args) as s:
+                    result = await call_with_retry(
+                        lambda: tools_by_name[tool_name].ainvoke(tool_args), tool_retry_policy()
+                    )
+                    if s:
+                        s.set(results=len(result) if isinstance(result, list) else 1)
+
+                # Keep only the page passages relevant to this task and query
+                result = condense_tool_result(tool_name, tool_args, result, state["task"].detailed_task_outline)
 
                 # Create a tool message with the result
                 tool_message = ToolMessage(
                     content=str(result),
                     tool_call_id=tool_id
                 )
-                tool_messages.append(tool_message)
             except Exception as e:
                 # Create an error tool message (only show errors)
                 tool_message = ToolMessage(
                     content=f"Error executing {tool_name}: {str(e)}",
                     tool_call_id=tool_id
                 )
-                tool_messages.append(tool_message)
+            return tool_message, time.perf_counter() - started
+
+    batch_started = time.perf_counter()
+    outcomes = await asyncio.gather(*(run_tool_call(tool_call) for tool_call in tool_calls))
+    wall_time = time.perf_counter() - batch_started
+
+    # gather preserves order, so messages line up with the tool calls
+    tool_messages = [message for message, _ in outcomes]
+    sequential_time = sum(elapsed for _, elapsed in outcomes)
+
+    stats = state.get("tool_stats") or new_tool_stats()
+    stats["batches"] += 1
+    stats["calls"] += num_calls
+    stats["wall_seconds"] += wall_time
+    stats["sequential_seconds"] += sequential_time
+    stats["seconds_saved"] += max(0.0, sequential_time - wall_time)
+    state["tool_stats"] = stats
+
+    if num_calls > 1:
+        print(
+            f"        ⇉ {num_calls} tool calls in {wall_time:.1f}s "
+            f"(sequential {sequential_time:.1f}s, saved {max(0.0, sequential_time - wall_time):.1f}s)"
+        )
 
     # Add all tool messages to the state
     state["messages"].extend(tool_messages)
     return state
 
-def create_worker_graph(task: WorkerTask):
-    """Create the subgraph for the worker agent execution."""
-    from typing import TypedDict
-
-    # Define state as a TypedDict instead of Pydantic model
-    class WorkerState(TypedDict):
-        task: WorkerTask
-        messages: list
-        final_result: str
-        llm: Optional[ChatOpenAI]
-        iteration_count: int
-        tool_calls_count: int
 
+def new_tool_stats() -> dict:
+    """Per-worker tool execution timings."""
+    return {"batches": 0, "calls": 0, "wall_seconds": 0.0, "sequential_seconds": 0.0, "seconds_saved": 0.0}
+
+
+class WorkerState(TypedDict):
+    """State of a worker sub-graph run."""
+    task: WorkerTask
+    messages: list
+    final_result: str
+    llm: Optional[ChatOpenAI]
+    iteration_count: int
+    tool_calls_count: int
+    context_stats: dict
+    tool_stats: dict
+    upstream_digest: str
+
+
+def _build_worker_graph(needs_web_search: bool):
+    """Build and compile the worker sub-graph, with or without the tool loop."""
     worker = StateGraph(WorkerState)
     worker.add_node("init", init_node)
     worker.add_node("execute", execute_task)
 
     # Add custom tool execution node if task needs web search
-    if task.needs_web_search:
+    if needs_web_search:
         worker.add_node("tools", execute_tools)
 
     worker.set_entry_point("init")
     worker.add_edge("init", "execute")
 
-    if task.needs_web_search:
+    if needs_web_search:
         worker.add_conditional_edges("execute", should_continue, {"tools": "tools", "end": END})
         worker.add_edge("tools", "execute")
     else:
@@ -228,4 +277,20 @@ def create_worker_graph(task: WorkerTask):
         worker.add_edge("execute", END)
 
     # Compile with increased recursion limit
-    return worker.compile(checkpointer=None, interrupt_before=None, interrupt_after=None, debug=False)
\ No newline at end of file
+    return worker.compile(checkpointer=None, interrupt_before=None, interrupt_after=None, debug=False)
+
+
+@lru_cache(maxsize=None)
+def get_worker_graph(needs_web_search: bool):
+    """
+    Return the compiled worker sub-graph for a task shape.
+
+    There are only two shapes, so each is compiled once and shared by every
+    worker; compiled graphs hold no per-run state.
+    """
+    return _build_worker_graph(needs_web_search)
+
+
+def create_worker_graph(task: WorkerTask):
+    """Return the (cached) subgraph for the worker agent execution."""
+    return get_worker_graph(task.needs_web_search)
@@ -0,0 +1,237 @@
+"""
+Persistent on-disk cache for fetched page content.
+
+Extracted markdown is stored zlib-compressed in SQLite, keyed by canonical
+URL, together with the ETag/Last-Modified validators from the response.
+Entries younger than the TTL are served without any network traffic; older
+entries are revalidated with a conditional GET and reused on 304. The least
+recently used entries are evicted once the stored bytes exceed the cap.
+
+Configuration (environment variables):
+
+- PAGE_CACHE_ENABLED (default true)
+- PAGE_CACHE_PATH (default .cache/pages.sqlite3 next to this file)
+- PAGE_CACHE_TTL seconds before revalidation (default 86400)
+- PAGE_CACHE_MAX_BYTES of compressed content (default 256 MiB)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only carry tracking information
+TRACKING_PARAMS = {
+    "gclid", "dclid", "fbclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "_hsenc", "_hsmkt", "ref", "ref_src", "spm", "cmpid",
+}
+TRACKING_PREFIXES = ("utm_",)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a URL for use as a cache key.
+
+    Lowercases scheme and host, drops default ports, fragments and tracking
+    parameters, and sorts the remaining query parameters.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+
+    netloc = host
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{parts.port}"
+    if parts.username:
+        auth = parts.username + (f":{parts.password}" if parts.password else "")
+        netloc = f"{auth}@{netloc}"
+
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+
+    return urlunsplit((scheme, netloc, parts.path or "/", urlencode(query), ""))
+
+
+@dataclass
+class CachedPage:
+    """A cached page and the validators needed to revalidate it."""
+
+    url: str
+    content: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+    metadata: dict = field(default_factory=dict)
+
+    def is_fresh(self, ttl: float) -> bool:
+        """Return True if the entry can be served without revalidation."""
+        return time.time() - self.fetched_at < ttl
+
+    def revalidation_headers(self) -> dict:
+        """Headers for a conditional GET against the origin."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """SQLite-backed LRU cache of extracted page content."""
+
+    def __init__(self, path: str, ttl: float = 86400, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                content BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                metadata TEXT
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at)")
+
+        # Caches created before per-page metadata was stored
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(pages)")}
+        if "metadata" not in columns:
+            self._conn.execute("ALTER TABLE pages ADD COLUMN metadata TEXT")
+
+        # Running total of stored bytes, so puts need not re-sum the table.
+        # Writes by other processes sharing the file are picked up on restart.
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """Look up a page by URL, marking it as recently used."""
+        key = canonicalize_url(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, content, etag, last_modified, fetched_at, metadata FROM pages WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE pages SET accessed_at = ? WHERE key = ?", (time.time(), key))
+
+        self.hits += 1
+        stored_url, blob, etag, last_modified, fetched_at, metadata = row
+        return CachedPage(
+            url=stored_url,
+            content=zlib.decompress(blob).decode("utf-8"),
+            etag=etag,
+            last_modified=last_modified,
+            fetched_at=fetched_at,
+            metadata=json.loads(metadata) if metadata else {},
+        )
+
+    def put(
+        self,
+        url: str,
+        content: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        metadata: Optional[dict] = None,
+    ) -> None:
+        """Store extracted content for a URL and evict old entries if over the byte cap."""
+        blob = zlib.compress(content.encode("utf-8"), 6)
+        now = time.time()
+        key = canonicalize_url(url)
+        with self._lock:
+            replaced = self._conn.execute("SELECT size FROM pages WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO pages
+                    (key, url, content, size, etag, last_modified, fetched_at, accessed_at, metadata)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    key, url, blob, len(blob), etag, last_modified, now, now,
+                    json.dumps(metadata) if metadata else None,
+                ),
+            )
+            self._total_bytes += len(blob) - (replaced[0] if replaced else 0)
+            self._evict()
+
+    def mark_revalidated(self, url: str) -> None:
+        """Reset an entry's age after the origin answered 304 Not Modified."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET fetched_at = ?, accessed_at = ? WHERE key = ?",
+                (now, now, canonicalize_url(url)),
+            )
+        self.revalidated += 1
+
+    def total_bytes(self) -> int:
+        """Return the number of compressed content bytes stored."""
+        with self._lock:
+            return self._total_bytes
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until the cache fits in max_bytes. Caller holds the lock."""
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        evicted = []
+        for key, size in self._conn.execute("SELECT key, size FROM pages ORDER BY accessed_at ASC"):
+            if self._total_bytes <= self.max_bytes:
+                break
+            evicted.append((key,))
+            self._total_bytes -= size
+        self._conn.executemany("DELETE FROM pages WHERE key = ?", evicted)
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+_page_cache: Optional[PageCache] = None
+_page_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> Optional[PageCache]:
+    """Return the process-wide page cache, or None if caching is disabled."""
+    global _page_cache
+
+    if os.getenv("PAGE_CACHE_ENABLED", "true").strip().lower() in ("0", "false", "no", "off"):
+        return None
+
+    with _page_cache_lock:
+        if _page_cache is None:
+            default_path = os.path.join(os.path.dirname(__file__), ".cache", "pages.sqlite3")
+            _page_cache = PageCache(
+                path=os.getenv("PAGE_CACHE_PATH", default_path),
+                ttl=float(os.getenv("PAGE_CACHE_TTL", "86400")),
+                max_bytes=int(os.getenv("PAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+            )
+    return _page_cache
@@ -0,0 +1,253 @@
+"""
+Passage selection for fetched page content.
+
+Fetched pages are split into passages and ranked with BM25 against the
+worker's task outline and the tool query. Only the best passages that fit in
+a token budget are passed to the LLM, in their original document order.
+
+Configuration (environment variables):
+
+- TOOL_RESULT_TOKEN_BUDGET tokens of page content per tool call (default 2000)
+- PASSAGE_TOP_K maximum passages kept per page (default 8)
+"""
+
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from utils import count_tokens
+
+# Target size of a passage
+PASSAGE_TOKENS = 200
+
+# Placed between non-adjacent passages in the condensed content
+OMISSION_MARKER = "[...]"
+
+# Tool query terms count more than task outline terms
+TOOL_QUERY_WEIGHT = 2.0
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "how", "in", "into",
+    "is", "it", "its", "of", "on", "or", "that", "the", "their", "this", "to", "was", "were", "what",
+    "when", "which", "who", "will", "with", "you", "your", "should", "each", "any", "all", "use",
+}
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _terms(text: str) -> List[str]:
+    """Lowercased word terms without stopwords."""
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+def split_passages(markdown: str, max_tokens: int = PASSAGE_TOKENS) -> List[str]:
+    """
+    Split normalized markdown into passages of roughly `max_tokens` tokens.
+
+    Blocks (separated by blank lines) are packed into passages; a heading
+    always starts a new passage, and passages that continue a section are
+    prefixed with that section's heading for context.
+    """
+    passages: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    heading = ""
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            if heading and not current[0].startswith("#"):
+                current.insert(0, heading)
+            passages.append("\n\n".join(current))
+        current = []
+        current_tokens = 0
+
+    for block in markdown.split("\n\n"):
+        block = block.strip()
+        if not block:
+            continue
+        tokens = count_tokens(block)
+        if block.startswith("#"):
+            flush()
+            heading = block
+        elif current_tokens + tokens > max_tokens and current and not (len(current) == 1 and current[0].startswith("#")):
+            # Never leave a heading on its own
+            flush()
+        current.append(block)
+        current_tokens += tokens
+
+    flush()
+    return passages
+
+
+def bm25_scores(passages: List[str], query_weights: Dict[str, float]) -> List[float]:
+    """Score each passage against weighted query terms with Okapi BM25."""
+    docs = [Counter(_terms(p)) for p in passages]
+    if not docs:
+        return []
+    lengths = [sum(d.values()) for d in docs]
+    avg_length = (sum(lengths) / len(lengths)) or 1.0
+    n = len(docs)
+    idf = {}
+    for term in query_weights:
+        df = sum(1 for d in docs if term in d)
+        if df:
+            idf[term] = math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    scores = []
+    for doc, length in zip(docs, lengths):
+        score = 0.0
+        for term, weight in query_weights.items():
+            tf = doc.get(term)
+            if not tf:
+                continue
+            score += weight * idf[term] * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length))
+        scores.append(score)
+    return scores
+
+
+def build_query(task_outline: str, tool_query: str = "") -> Dict[str, float]:
+    """Combine the task outline and tool query into weighted query terms."""
+    weights: Dict[str, float] = {}
+    for term in set(_terms(task_outline)):
+        weights[term] = 1.0
+    for term in set(_terms(tool_query)):
+        weights[term] = weights.get(term, 0.0) + TOOL_QUERY_WEIGHT
+    return weights
+
+
+def select_passages(
+    content: str,
+    query_weights: Dict[str, float],
+    token_budget: int,
+    top_k: int,
+) -> Tuple[str, int, int]:
+    """
+    Keep the highest-scoring passages of `content` that fit in `token_budget`.
+
+    Returns:
+        (condensed content, passages kept, passages total). Content that
+        already fits in the budget is returned unchanged.
+    """
+    if count_tokens(content) <= token_budget:
+        return content, 1, 1
+
+    passages = split_passages(content)
+    scores = bm25_scores(passages, query_weights)
+    ranked = sorted(range(len(passages)), key=lambda i: scores[i], reverse=True)
+
+    chosen: List[int] = []
+    used = 0
+    for i in ranked:
+        if len(chosen) >= top_k:
+            break
+        tokens = count_tokens(passages[i])
+        if used + tokens > token_budget:
+            continue
+        chosen.append(i)
+        used += tokens
+
+    if not chosen and passages:
+        # Every passage is larger than the budget; keep the start of the best one
+        best = ranked[0]
+        passages[best] = passages[best][: token_budget * 4]
+        chosen.append(best)
+
+    return _join_passages(passages, chosen), len(chosen), len(passages)
+
+
+def select_passages_shared(
+    contents: List[str],
+    query_weights: Dict[str, float],
+    token_budget: int,
+    top_k: Optional[int] = None,
+) -> List[Tuple[str, int, int]]:
+    """
+    Condense several documents to their best passages within one shared `token_budget`.
+
+    The passages of all documents are ranked together, so the budget goes to
+    the most relevant passages wherever they are instead of being split
+    evenly. Each kept passage is charged for the separator and omission marker
+    that may precede it, and each document for a trailing marker, so the
+    joined results never exceed the budget. At most `top_k` passages are kept
+    per document.
+
+    Returns:
+        (condensed content, passages kept, passages total) for each document,
+        in order. Documents that already fit together are returned unchanged;
+        a document with no passage kept becomes OMISSION_MARKER.
+    """
+    if sum(count_tokens(content) for content in contents) <= token_budget:
+        return [(content, 1, 1) for content in contents]
+
+    documents = [split_passages(content) for content in contents]
+    flat = [(d, i) for d, passages in enumerate(documents) for i in range(len(passages))]
+    scores = bm25_scores([documents[d][i] for d, i in flat], query_weights)
+    ranked = sorted(range(len(flat)), key=lambda k: scores[k], reverse=True)
+
+    gap = count_tokens(f"\n\n{OMISSION_MARKER}\n\n")
+    used = gap * len(contents)
+    chosen: List[List[int]] = [[] for _ in contents]
+    for k in ranked:
+        d, i = flat[k]
+        if top_k is not None and len(chosen[d]) >= top_k:
+            continue
+        tokens = count_tokens(documents[d][i]) + gap
+        if used + tokens > token_budget:
+            continue
+        chosen[d].append(i)
+        used += tokens
+
+    return [
+        (_join_passages(passages, indices) if indices else OMISSION_MARKER, len(indices), len(passages))
+        for passages, indices in zip(documents, chosen)
+    ]
+
+
+def _join_passages(passages: List[str], chosen: List[int]) -> str:
+    """Join the chosen passages in document order, marking the gaps between them."""
+    chosen = sorted(chosen)
+    parts: List[str] = []
+    for position, i in enumerate(chosen):
+        if position == 0 and i > 0 or position > 0 and i != chosen[position - 1] + 1:
+            parts.append(OMISSION_MARKER)
+        parts.append(passages[i])
+    if chosen and chosen[-1] < len(passages) - 1:
+        parts.append(OMISSION_MARKER)
+    return "\n\n".join(parts)
+
+
+def condense_tool_result(tool_name: str, tool_args: dict, result, task_outline: str):
+    """
+    Reduce the page content in a fetch or search_and_fetch result to relevant passages.
+
+    All pages in one result share the token budget (see
+    `select_passages_shared`), so the result stays within it however many
+    pages there are. Each condensed page gets a 'passages' field such as
+    "5 of 23 selected". Other tools' results are returned unchanged.
+    """
+    if tool_name not in ("fetch", "search_and_fetch"):
+        return result
+
+    budget = int(os.getenv("TOOL_RESULT_TOKEN_BUDGET", "2000"))
+    top_k = int(os.getenv("PASSAGE_TOP_K", "8"))
+    query_weights = build_query(task_outline, tool_args.get("query", ""))
+
+    pages = result if isinstance(result, list) else [result]
+    pages_with_content = [p for p in pages if isinstance(p, dict) and p.get("content")]
+    if not pages_with_content:
+        return result
+
+    selected = select_passages_shared([p["content"] for p in pages_with_content], query_weights, budget, top_k)
+    for page, (content, kept, total) in zip(pages_with_content, selected):
+        if kept < total:
+            page["content"] = content
+            page["passages"] = f"{kept} of {total} selected"
+
+    return result
@@ -0,0 +1,32 @@
+"""
+Progress events for research runs.
+
+Graph nodes, phases and workers announce when they start and finish by
+calling `emit`. Each event is a plain dict with `event`, `run_id` and `time`
+keys plus event-specific fields, delivered to the callbacks in the current
+run's `RunContext.progress_subscribers` (for example the HTTP server's event
+streams, see server.py). Without subscribers, `emit` returns immediately.
+
+Events: node_started, node_finished, phase_started, phase_finished,
+worker_started, worker_finished, section_drafted (map-reduce synthesis, see
+nodes/synthesis.py), report_chunk (streamed report text) and report_finished
+(with time to first token and tokens per second).
+"""
+
+import time
+from typing import Any
+
+from run_context import current_run
+
+
+def emit(event: str, **data: Any) -> None:
+    """Send an event to the current run's progress subscribers."""
+    run = current_run()
+    if run is None or not run.progress_subscribers:
+        return
+    payload = {"event": event, "run_id": run.run_id, "time": time.time(), **data}
+    for subscriber in list(run.progress_subscribers):
+        try:
+            subscriber(payload)
+        except Exception as e:
+            print(f"⚠ Progress subscriber failed on {event}: {e}")
@@ -12,4 +12,5 @@ def load_system_prompt(file_name: str) -> str:
 PLANNING_AGENT_SYSTEM_PROMPT = load_system_prompt('planning_agent.md')
 WORKER_AGENT_SYSTEM_PROMPT = load_system_prompt('worker_agent_prompt.md')
 EVALUATION_AGENT_SYSTEM_PROMPT = load_system_prompt('evaluation_agent.md')
-SYNTHESIS_AGENT_SYSTEM_PROMPT = load_system_prompt('synthesis_agent.md')
\ No newline at end of file
+SYNTHESIS_AGENT_SYSTEM_PROMPT = load_system_prompt('synthesis_agent.md')
+SYNTHESIS_SECTION_AGENT_SYSTEM_PROMPT = load_system_prompt('synthesis_section_agent.md')
\ No newline at end of file
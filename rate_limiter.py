@@ -0,0 +1,140 @@
+"""
+Client-side requests-per-minute and tokens-per-minute limiting for LLM calls.
+
+Every LLM call reserves one request and its estimated tokens from two token
+buckets before it is sent, and waits in FIFO order if either bucket is
+empty. That way calls queue locally instead of being rejected by the
+provider with a 429. Once the response arrives, the token estimate is
+corrected with the reported usage.
+
+Configuration (environment variables, 0 disables a limit):
+
+- OPENAI_RPM_LIMIT requests per minute (default 500)
+- OPENAI_TPM_LIMIT tokens per minute (default 200000)
+- LLM_OUTPUT_TOKEN_ESTIMATE completion tokens reserved per call (default 1000)
+"""
+
+import asyncio
+import os
+import time
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """Bucket refilled continuously up to a per-minute capacity."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken from the bucket."""
+        self._refill()
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float) -> None:
+        """Take `amount` from the bucket. Negative amounts give tokens back."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class LLMRateLimiter:
+    """Requests-per-minute and tokens-per-minute limiter shared by all LLM calls."""
+
+    def __init__(self, requests_per_minute: float = 500, tokens_per_minute: float = 200_000):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Counters
+        self.calls = 0
+        self.waits = 0
+        self.seconds_waited = 0.0
+        self.estimated_tokens = 0
+        self.actual_tokens = 0
+
+    async def acquire(self, estimated_tokens: int) -> int:
+        """
+        Wait until one request and `estimated_tokens` tokens are available, then take them.
+
+        Returns:
+            The number of tokens reserved. Requests larger than the whole
+            per-minute budget reserve the full budget, so they still run.
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+
+        reserved = estimated_tokens
+        if self.tokens is not None:
+            reserved = min(estimated_tokens, int(self.tokens.capacity))
+
+        # The lock keeps waiters in arrival order
+        async with self._lock:
+            while True:
+                wait = max(
+                    self.requests.wait_time(1) if self.requests else 0.0,
+                    self.tokens.wait_time(reserved) if self.tokens else 0.0,
+                )
+                if wait <= 0:
+                    break
+                self.waits += 1
+                self.seconds_waited += wait
+                await asyncio.sleep(wait)
+
+            if self.requests:
+                self.requests.consume(1)
+            if self.tokens:
+                self.tokens.consume(reserved)
+
+        self.calls += 1
+        self.estimated_tokens += reserved
+        return reserved
+
+    def reconcile(self, reserved: int, actual_tokens: Optional[int]) -> None:
+        """Correct a reservation with the tokens the provider reported using."""
+        if actual_tokens is None:
+            actual_tokens = reserved
+        self.actual_tokens += actual_tokens
+        if self.tokens:
+            self.tokens.consume(actual_tokens - reserved)
+
+    def metrics(self) -> Dict[str, float]:
+        """Call, wait and token counters."""
+        return {
+            "calls": self.calls,
+            "waits": self.waits,
+            "seconds_waited": round(self.seconds_waited, 2),
+            "estimated_tokens": self.estimated_tokens,
+            "actual_tokens": self.actual_tokens,
+        }
+
+
+_rate_limiter: Optional[LLMRateLimiter] = None
+
+
+def get_rate_limiter() -> LLMRateLimiter:
+    """Return the process-wide LLM rate limiter."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = LLMRateLimiter(
+            requests_per_minute=float(os.getenv("OPENAI_RPM_LIMIT", "500")),
+            tokens_per_minute=float(os.getenv("OPENAI_TPM_LIMIT", "200000")),
+        )
+    return _rate_limiter
+
+
+def output_token_estimate() -> int:
+    """Completion tokens reserved for each call before its usage is known."""
+    return int(os.getenv("LLM_OUTPUT_TOKEN_ESTIMATE", "1000"))
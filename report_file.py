@@ -0,0 +1,93 @@
+"""
+Markdown report files with a metadata header.
+
+A report file is front matter and a title block, the report body, then a
+footer. `ReportWriter` writes the header as soon as it is opened and appends
+the body as synthesis streams it, so the file can be followed while the
+report is generated. It writes to `<path>.partial` and moves the file onto
+`<path>` only once the report is complete, so a failed or cancelled synthesis
+never replaces an existing report.
+"""
+
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+REPORT_FOOTER = """
+
+---
+
+*This report was generated by the Multi-Agent Research System*
+"""
+
+PARTIAL_SUFFIX = ".partial"
+
+INTERRUPTED_FOOTER = """
+
+---
+
+*Report generation was interrupted; this report is incomplete.*
+"""
+
+
+def report_header(query: str, timestamp: Optional[str] = None) -> str:
+    """Front matter and title block that precede the report body."""
+    timestamp = timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return f"""---
+title: Research Report
+query: {query}
+generated: {timestamp}
+system: Multi-Agent Research System
+---
+
+# Research Report
+
+**Query:** {query}
+
+**Generated:** {timestamp}
+
+---
+
+"""
+
+
+class ReportWriter:
+    """
+    Write a report file incrementally: header first, body as it arrives, footer last.
+
+    Everything goes to `partial_path` until `close(complete=True)` moves it
+    onto `path`. An incomplete report stays at `partial_path`, marked as
+    interrupted; one that received no text is removed.
+    """
+
+    def __init__(self, path: str, query: str):
+        self.path = Path(path)
+        self.partial_path = self.path.with_name(self.path.name + PARTIAL_SUFFIX)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._written = False
+        self._file = open(self.partial_path, "w", encoding="utf-8")
+        self._file.write(report_header(query))
+        self._file.flush()
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def write(self, text: str) -> None:
+        """Append body text; the file is flushed at line ends so readers see whole lines."""
+        self._written = self._written or bool(text)
+        self._file.write(text)
+        if "\n" in text:
+            self._file.flush()
+
+    def close(self, complete: bool = True) -> None:
+        """Write the footer (or a note that the report is incomplete), close the file and publish it if complete."""
+        if self._file.closed:
+            return
+        self._file.write(REPORT_FOOTER if complete else INTERRUPTED_FOOTER)
+        self._file.close()
+        if complete:
+            os.replace(self.partial_path, self.path)
+        elif not self._written:
+            self.partial_path.unlink(missing_ok=True)
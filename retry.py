@@ -0,0 +1,237 @@
+"""
+Shared retry policy for LLM and tool calls.
+
+Every LLM request (through `utils.ainvoke_llm`) and every worker tool call
+runs under `call_with_retry`. Failed attempts are retried with
+decorrelated-jitter backoff, which spreads retries from concurrent callers
+instead of having them all retry together. A server-sent Retry-After is
+honored. Each attempt has a timeout, and the call as a whole has a deadline.
+A call can limit both to its request (see `call_with_retry`'s
+`timed_section`), so time spent queued locally for a rate limit or a
+concurrency slot is never mistaken for a slow request. Errors that will not
+succeed on retry, such as bad requests, authentication failures and
+oversized prompts, are raised immediately.
+
+Configuration (environment variables):
+
+- LLM_MAX_ATTEMPTS (default 4)
+- LLM_CALL_TIMEOUT seconds per attempt (default 300)
+- LLM_RETRY_DEADLINE seconds per call including retries (default 600)
+- TOOL_MAX_ATTEMPTS (default 3)
+- TOOL_CALL_TIMEOUT seconds per attempt (default 45)
+- TOOL_RETRY_DEADLINE seconds per call including retries (default 90)
+"""
+
+import asyncio
+import os
+import random
+import time
+from dataclasses import asdict, dataclass
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+import openai
+from ddgs.exceptions import RatelimitException, TimeoutException
+
+T = TypeVar("T")
+
+# Longest server-requested wait that is honored
+MAX_RETRY_AFTER = 60.0
+
+# HTTP statuses worth retrying
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How often and how long a kind of call is retried."""
+
+    name: str
+    max_attempts: int = 4
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+    # Seconds allowed per attempt, and for the whole call including backoff
+    attempt_timeout: Optional[float] = None
+    deadline: Optional[float] = None
+
+
+@dataclass
+class RetryStats:
+    """Counters for one retry policy."""
+
+    calls: int = 0
+    attempts: int = 0
+    retries: int = 0
+    timeouts: int = 0
+    non_retryable: int = 0
+    gave_up: int = 0
+    seconds_sleeping: float = 0.0
+
+
+_stats: Dict[str, RetryStats] = {}
+
+
+def llm_retry_policy() -> RetryPolicy:
+    """Retry policy for LLM requests."""
+    return RetryPolicy(
+        name="llm",
+        max_attempts=int(os.getenv("LLM_MAX_ATTEMPTS", "4")),
+        base_delay=1.0,
+        max_delay=30.0,
+        attempt_timeout=float(os.getenv("LLM_CALL_TIMEOUT", "300")),
+        deadline=float(os.getenv("LLM_RETRY_DEADLINE", "600")),
+    )
+
+
+def tool_retry_policy() -> RetryPolicy:
+    """Retry policy for worker tool calls (search and fetch)."""
+    return RetryPolicy(
+        name="tool",
+        max_attempts=int(os.getenv("TOOL_MAX_ATTEMPTS", "3")),
+        base_delay=0.5,
+        max_delay=10.0,
+        attempt_timeout=float(os.getenv("TOOL_CALL_TIMEOUT", "45")),
+        deadline=float(os.getenv("TOOL_RETRY_DEADLINE", "90")),
+    )
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Return True if the call that raised `error` may succeed when retried."""
+    if isinstance(error, openai.RateLimitError):
+        # Oversized prompts and exhausted quota fail the same way every time
+        code = getattr(error, "code", None)
+        return "Request too large" not in str(error) and code != "insufficient_quota"
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS_CODES
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    if isinstance(error, (httpx.TransportError, RatelimitException, TimeoutException, TimeoutError)):
+        return True
+    return False
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Read the server-requested delay from an error's response headers, if any."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return min(MAX_RETRY_AFTER, max(0.0, float(value) / 1000))
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(MAX_RETRY_AFTER, max(0.0, seconds))
+
+
+async def call_with_retry(
+    fn: Callable[..., Awaitable[T]],
+    policy: RetryPolicy,
+    on_error: Optional[Callable[[BaseException], None]] = None,
+    timed_section: bool = False,
+) -> T:
+    """
+    Await `fn()` under `policy`, retrying transient failures.
+
+    Args:
+        fn: Creates a fresh awaitable for each attempt
+        policy: Attempts, backoff and deadlines to apply
+        on_error: Called with every exception raised by an attempt
+        timed_section: If True, `fn` is called as `fn(timed)` and only the
+            awaitables it passes to `timed` run under the attempt timeout and
+            the deadline; the rest of the attempt (such as waiting for a local
+            rate limiter) is neither timed nor counted against the deadline
+
+    Raises:
+        The last attempt's exception once the error is not retryable, the
+        attempts are used up or the next wait would pass the deadline.
+        Attempt timeouts are raised as TimeoutError.
+    """
+    stats = _stats.setdefault(policy.name, RetryStats())
+    stats.calls += 1
+    started = time.monotonic()
+    # Time spent in the untimed part of attempts, excluded from the deadline
+    untimed_seconds = 0.0
+    delay = policy.base_delay
+
+    def attempt_timeout() -> Optional[float]:
+        timeout = policy.attempt_timeout
+        if policy.deadline is not None:
+            elapsed = time.monotonic() - started - untimed_seconds
+            remaining = max(0.0, policy.deadline - elapsed)
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        return timeout
+
+    async def run_timed(awaitable: Awaitable[T]) -> T:
+        timeout = attempt_timeout()
+        if timeout is None:
+            return await awaitable
+        return await asyncio.wait_for(awaitable, timeout)
+
+    for attempt in range(1, policy.max_attempts + 1):
+        stats.attempts += 1
+
+        try:
+            if not timed_section:
+                return await run_timed(fn())
+
+            attempt_started = time.monotonic()
+            timed_seconds = 0.0
+
+            async def timed(awaitable: Awaitable[T]) -> T:
+                nonlocal timed_seconds
+                section_started = time.monotonic()
+                try:
+                    return await run_timed(awaitable)
+                finally:
+                    timed_seconds += time.monotonic() - section_started
+
+            try:
+                return await fn(timed)
+            finally:
+                untimed_seconds += time.monotonic() - attempt_started - timed_seconds
+        except Exception as e:
+            if isinstance(e, TimeoutError):
+                stats.timeouts += 1
+            if on_error is not None:
+                on_error(e)
+            if not is_retryable(e):
+                stats.non_retryable += 1
+                raise
+            if attempt == policy.max_attempts:
+                stats.gave_up += 1
+                raise
+
+            # Decorrelated jitter, but never sooner than the server asked
+            delay = min(policy.max_delay, random.uniform(policy.base_delay, delay * 3))
+            wait = max(delay, retry_after_seconds(e) or 0.0)
+            if policy.deadline is not None and time.monotonic() - started - untimed_seconds + wait >= policy.deadline:
+                stats.gave_up += 1
+                raise
+
+            stats.retries += 1
+            stats.seconds_sleeping += wait
+            await asyncio.sleep(wait)
+
+    raise RuntimeError("unreachable")
+
+
+def retry_stats() -> Dict[str, Dict[str, float]]:
+    """Counters for every retry policy used in this process."""
+    return {name: asdict(stats) for name, stats in _stats.items()}
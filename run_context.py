@@ -0,0 +1,87 @@
+"""
+Run-scoped shared state for a single research run.
+
+A RunContext is installed in a context variable around `research_graph.ainvoke`
+so that graph nodes, worker sub-graphs and tools running inside that run can
+reach the same objects without threading them through every state dict.
+Concurrent runs in one event loop each see their own context.
+"""
+
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional
+
+from page_cache import canonicalize_url
+from singleflight import SingleFlight
+from usage import UsageLedger
+
+_current_run: ContextVar[Optional["RunContext"]] = ContextVar("current_run", default=None)
+
+
+@dataclass
+class RunContext:
+    """Resources shared by every node, worker and tool call in one research run."""
+
+    run_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+
+    # Successful fetches in this run, keyed by canonical URL
+    fetched: Dict[str, object] = field(default_factory=dict)
+    fetch_flight: SingleFlight = field(default_factory=SingleFlight)
+    fetch_requests: int = 0
+    fetches_deduplicated: int = 0
+
+    # LLM tokens, cost and latency by node, phase and task
+    usage: UsageLedger = field(default_factory=UsageLedger)
+
+    # Callbacks receiving this run's progress events (see progress.py)
+    progress_subscribers: List[Callable[[dict], None]] = field(default_factory=list)
+
+    async def dedup_fetch(self, url: str, fetch: Callable[[], Awaitable[object]]) -> object:
+        """
+        Fetch `url` at most once per run.
+
+        Concurrent requests for the same canonical URL share one in-flight
+        call, and completed results are reused by later workers. Failed
+        fetches are not remembered, so a later request retries them.
+        """
+        key = canonicalize_url(url)
+        self.fetch_requests += 1
+
+        if key in self.fetched:
+            self.fetches_deduplicated += 1
+            return self.fetched[key]
+
+        if self.fetch_flight.in_flight(key):
+            self.fetches_deduplicated += 1
+        result = await self.fetch_flight.do(key, fetch)
+        self.fetched[key] = result
+        return result
+
+
+def current_run() -> Optional[RunContext]:
+    """Return the RunContext of the run executing in this task, if any."""
+    return _current_run.get()
+
+
+@contextmanager
+def run_context(run_id: Optional[str] = None) -> Iterator[RunContext]:
+    """Install a fresh RunContext for the duration of the block."""
+    run = RunContext(run_id=run_id) if run_id else RunContext()
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
+
+
+@contextmanager
+def ensure_run_context(run_id: Optional[str] = None) -> Iterator[RunContext]:
+    """Reuse the active RunContext, or install one for the block if there is none."""
+    run = current_run()
+    if run is not None:
+        yield run
+        return
+    with run_context(run_id) as run:
+        yield run
@@ -0,0 +1,438 @@
+"""
+HTTP service that runs research jobs in one long-lived process.
+
+The research graph, worker graphs, LLM clients, HTTP pools and caches are
+created once at startup and shared by every job, so a job pays none of the
+import and setup cost of `python main.py`. Submitted jobs wait in a bounded
+queue and at most SERVER_MAX_RUNNING_JOBS run at once. When the queue is full,
+new jobs are rejected with 429 and a Retry-After estimate instead of piling up.
+
+Endpoints:
+
+- POST   /jobs                 submit {"query": ...}; 202 with the job, 429 when full
+- GET    /jobs                 list known jobs
+- GET    /jobs/{id}            job status
+- GET    /jobs/{id}/events     progress as Server-Sent Events (node, phase and
+                               worker start/finish, then job_finished)
+- GET    /jobs/{id}/result     report, usage and errors; 409 until the job ends
+- DELETE /jobs/{id}            cancel a queued or running job
+- GET    /health               queue depth, running jobs and limiter state
+
+A job's id is its run id, so a failed or cancelled job can be resumed from
+its checkpoint with `python main.py --resume <id>`.
+
+Configuration (environment variables):
+
+- SERVER_HOST (default 127.0.0.1) and SERVER_PORT (default 8000)
+- SERVER_MAX_RUNNING_JOBS jobs running at once (default 2)
+- SERVER_MAX_QUEUED_JOBS jobs waiting before 429 (default 20)
+- SERVER_MAX_FINISHED_JOBS finished jobs kept for status and results (default 200)
+- SERVER_FINISHED_JOB_TTL seconds a finished job is kept (default 3600)
+
+Usage:
+    python server.py
+    curl -X POST localhost:8000/jobs -H 'Content-Type: application/json' -d '{"query": "..."}'
+    curl -N localhost:8000/jobs/<id>/events
+"""
+
+import asyncio
+import json
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Deque, List, Optional, Tuple
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from checkpoints import get_checkpoint_store
+from concurrency import get_llm_limiter, get_worker_limiter
+from http_client import aclose_clients
+from models import AgentState
+from nodes.research_agent import research_graph
+from nodes.worker_agent import get_worker_graph
+from rate_limiter import get_rate_limiter
+from run_context import run_context
+from tools import get_tools_by_name
+from tracing import trace_run
+from utils import get_llm
+
+# Seconds between keep-alive comments on an idle event stream
+SSE_HEARTBEAT_SECONDS = 15
+
+# Assumed job duration for Retry-After before any job has finished
+DEFAULT_JOB_SECONDS = 120
+
+# Finished jobs whose durations feed the Retry-After estimate
+RECENT_DURATIONS = 20
+
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+
+class JobRequest(BaseModel):
+    """A research job submission."""
+
+    query: str = Field(
+        min_length=1,
+        description="The research query to investigate"
+    )
+
+
+@dataclass
+class Job:
+    """A research job and the progress events it has produced."""
+
+    job_id: str
+    query: str
+    status: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    state: Optional[AgentState] = None
+    # (event id, event); ids stay stable when report chunks are compacted
+    events: List[Tuple[int, dict]] = field(default_factory=list)
+    next_event_id: int = 0
+    # (chunk id, end offset in the merged text) for a compacted partial report
+    merged_chunks: List[Tuple[int, int]] = field(default_factory=list)
+    listeners: List[asyncio.Queue] = field(default_factory=list)
+    task: Optional[asyncio.Task] = None
+
+    def publish(self, event: dict) -> None:
+        """Record a progress event and pass it to every open event stream."""
+        entry = (self.next_event_id, event)
+        self.next_event_id += 1
+        self.events.append(entry)
+        for listener in self.listeners:
+            listener.put_nowait(entry)
+
+    def publish_job_event(self, event: str, **data) -> None:
+        self.publish({"event": event, "run_id": self.job_id, "time": time.time(), **data})
+
+    def compact_events(self) -> None:
+        """
+        Stop keeping a finished job's report twice, as chunks and as the result.
+
+        A completed job's report_chunk events are dropped, since the report is
+        in its result. A failed or cancelled job keeps its partial report as a
+        single chunk carrying the last chunk's id; `replay` sends a client only
+        the part of it after the chunks it has already seen.
+        """
+        chunks = [(event_id, event) for event_id, event in self.events if event["event"] == "report_chunk"]
+        if not chunks:
+            return
+        events = [entry for entry in self.events if entry[1]["event"] != "report_chunk"]
+        if self.status != "completed":
+            last_id, last = chunks[-1]
+            end = 0
+            for event_id, event in chunks:
+                end += len(event["text"])
+                self.merged_chunks.append((event_id, end))
+            merged = (last_id, {**last, "text": "".join(event["text"] for _, event in chunks)})
+            events.append(merged)
+            events.sort(key=lambda entry: entry[0])
+        self.events = events
+
+    def replay(self, last_seen: int) -> List[Tuple[int, dict]]:
+        """Recorded events after `last_seen`, with a merged report chunk cut to the unseen text."""
+        entries = []
+        for event_id, event in self.events:
+            if event_id <= last_seen:
+                continue
+            if event["event"] == "report_chunk" and self.merged_chunks:
+                seen = max((end for chunk_id, end in self.merged_chunks if chunk_id <= last_seen), default=0)
+                if seen:
+                    event = {**event, "text": event["text"][seen:]}
+            entries.append((event_id, event))
+        return entries
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "query": self.query,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "events": self.next_event_id,
+            "last_event": self.events[-1][1]["event"] if self.events else None,
+        }
+
+
+class JobManager:
+    """Bounded job queue drained by a fixed number of dispatcher tasks."""
+
+    def __init__(self, max_running: int, max_queued: int, max_finished: int, finished_ttl: float):
+        self.max_running = max_running
+        self.max_finished = max_finished
+        self.finished_ttl = finished_ttl
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queued)
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self.rejected = 0
+        self._durations: Deque[float] = deque(maxlen=RECENT_DURATIONS)
+        self._dispatchers: List[asyncio.Task] = []
+
+    @property
+    def running(self) -> int:
+        return sum(1 for job in self.jobs.values() if job.status == "running")
+
+    def start(self) -> None:
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.max_running)]
+
+    async def stop(self) -> None:
+        """Cancel the dispatchers and any running jobs."""
+        for job in self.jobs.values():
+            if job.task is not None and not job.task.done():
+                job.task.cancel()
+        for dispatcher in self._dispatchers:
+            dispatcher.cancel()
+        await asyncio.gather(*self._dispatchers, *(j.task for j in self.jobs.values() if j.task), return_exceptions=True)
+
+    def submit(self, query: str) -> Job:
+        """Queue a new job; raises asyncio.QueueFull when the queue is at capacity."""
+        job = Job(job_id=AgentState(query=query).run_id, query=query)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise
+        self.jobs[job.job_id] = job
+        self._prune()
+        job.publish_job_event("job_queued", position=self.queue.qsize())
+        return job
+
+    def cancel(self, job: Job) -> None:
+        """Cancel a queued job (the dispatcher skips it) or a running one."""
+        if job.task is not None and not job.task.done():
+            job.task.cancel()
+        elif job.status == "queued":
+            self._mark_cancelled(job)
+
+    def retry_after(self) -> int:
+        """Seconds until a queue slot is likely to free up: one running job finishing."""
+        recent = self._durations
+        average = sum(recent) / len(recent) if recent else DEFAULT_JOB_SECONDS
+        return max(1, math.ceil(average / max(1, self.max_running)))
+
+    async def _dispatch(self) -> None:
+        while True:
+            job = await self.queue.get()
+            try:
+                if job.status == "cancelled":
+                    continue
+                job.task = asyncio.create_task(self._run(job))
+                await asyncio.wait([job.task])
+                if job.status not in FINISHED_STATUSES:
+                    # Cancelled before the job got to start
+                    self._mark_cancelled(job)
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        job.publish_job_event("job_started")
+        state = AgentState(run_id=job.job_id, query=job.query)
+        try:
+            with run_context(state.run_id) as run, trace_run(run.run_id, query=state.query):
+                run.progress_subscribers.append(job.publish)
+                result = await research_graph.ainvoke(state)
+            final_state = result if isinstance(result, AgentState) else AgentState(**result)
+            final_state.usage = run.usage.to_dict()
+            final_state.total_tokens_used = run.usage.totals.total_tokens
+            job.state = final_state
+            job.status = "completed" if final_state.status == "completed" else "failed"
+            if job.status == "failed":
+                job.error = "; ".join(final_state.errors) or "Research failed"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = f"{type(e).__name__}: {e}"
+        finally:
+            job.finished_at = time.time()
+            self._durations.append(job.finished_at - job.started_at)
+            job.publish_job_event("job_finished", status=job.status, error=job.error)
+            job.compact_events()
+            self._prune()
+
+    def _mark_cancelled(self, job: Job) -> None:
+        job.status = "cancelled"
+        job.finished_at = time.time()
+        job.publish_job_event("job_finished", status=job.status, error=None)
+        self._prune()
+
+    def _prune(self) -> None:
+        """Forget finished jobs older than finished_ttl and the oldest beyond max_finished."""
+        cutoff = time.time() - self.finished_ttl
+        for job_id, job in list(self.jobs.items()):
+            if job.status in FINISHED_STATUSES and job.finished_at is not None and job.finished_at < cutoff:
+                del self.jobs[job_id]
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in FINISHED_STATUSES]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job_id]
+
+
+manager: Optional[JobManager] = None
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    global manager
+    # Build the shared clients, graphs and caches before the first job arrives
+    get_llm()
+    get_worker_graph(True)
+    get_worker_graph(False)
+    get_tools_by_name()
+    store = get_checkpoint_store()
+
+    manager = JobManager(
+        max_running=int(os.getenv("SERVER_MAX_RUNNING_JOBS", "2")),
+        max_queued=int(os.getenv("SERVER_MAX_QUEUED_JOBS", "20")),
+        max_finished=int(os.getenv("SERVER_MAX_FINISHED_JOBS", "200")),
+        finished_ttl=float(os.getenv("SERVER_FINISHED_JOB_TTL", "3600")),
+    )
+    manager.start()
+    print(f"✓ Research service ready ({manager.max_running} running, {manager.queue.maxsize} queued max)")
+    try:
+        yield
+    finally:
+        await manager.stop()
+        if store is not None:
+            await asyncio.to_thread(store.flush)
+        await aclose_clients()
+
+
+app = FastAPI(title="Multi-Agent Research Service", lifespan=lifespan)
+
+
+def _get_job(job_id: str) -> Job:
+    job = manager.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: JobRequest):
+    try:
+        job = manager.submit(request.query)
+    except asyncio.QueueFull:
+        retry_after = manager.retry_after()
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "Job queue is full", "queued": manager.queue.qsize(), "retry_after": retry_after},
+            headers={"Retry-After": str(retry_after)},
+        )
+    return {**job.to_dict(), "position": manager.queue.qsize()}
+
+
+@app.get("/jobs")
+async def list_jobs():
+    return [job.to_dict() for job in manager.jobs.values()]
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    return _get_job(job_id).to_dict()
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """
+    Stream the job's progress events as Server-Sent Events.
+
+    Past events are replayed first, so late subscribers see the whole run
+    (a finished job's report chunks are compacted, see `Job.compact_events`);
+    a reconnecting client's Last-Event-ID skips the events it already has.
+    The stream ends after job_finished.
+    """
+    job = _get_job(job_id)
+    try:
+        last_seen = int(request.headers.get("last-event-id") or -1)
+    except ValueError:
+        last_seen = -1
+
+    def format_event(event_id: int, event: dict) -> str:
+        return f"id: {event_id}\nevent: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+    async def stream():
+        # Snapshot and subscribe together so no event is missed or repeated
+        listener: asyncio.Queue = asyncio.Queue()
+        finished = bool(job.events) and job.events[-1][1]["event"] == "job_finished"
+        history = job.replay(last_seen)
+        job.listeners.append(listener)
+        try:
+            for event_id, event in history:
+                yield format_event(event_id, event)
+            if finished:
+                return
+            while True:
+                try:
+                    event_id, event = await asyncio.wait_for(listener.get(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if event_id > last_seen:
+                    yield format_event(event_id, event)
+                if event["event"] == "job_finished":
+                    return
+        finally:
+            job.listeners.remove(listener)
+
+    return StreamingResponse(
+        stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/jobs/{job_id}/result")
+async def job_result(job_id: str):
+    job = _get_job(job_id)
+    if job.status not in FINISHED_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {job.status}")
+    state = job.state
+    return {
+        **job.to_dict(),
+        "report": state.final_report if state else None,
+        "errors": state.errors if state else ([job.error] if job.error else []),
+        "total_tool_calls": state.total_tool_calls if state else 0,
+        "total_tokens_used": state.total_tokens_used if state else 0,
+        "usage": state.usage if state else {},
+    }
+
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    job = _get_job(job_id)
+    if job.status in FINISHED_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} already {job.status}")
+    manager.cancel(job)
+    if job.task is not None:
+        await asyncio.wait([job.task])
+    return job.to_dict()
+
+
+@app.get("/health")
+async def health():
+    llm_limiter = get_llm_limiter()
+    return {
+        "queued": manager.queue.qsize(),
+        "queue_capacity": manager.queue.maxsize,
+        "running": manager.running,
+        "max_running": manager.max_running,
+        "rejected": manager.rejected,
+        "jobs": len(manager.jobs),
+        "workers": get_worker_limiter().metrics(),
+        "llm_in_flight": llm_limiter.in_flight if llm_limiter else None,
+        "rate_limiter": get_rate_limiter().metrics(),
+    }
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host=os.getenv("SERVER_HOST", "127.0.0.1"), port=int(os.getenv("SERVER_PORT", "8000")))
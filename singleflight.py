@@ -0,0 +1,58 @@
+"""
+Single-flight coalescing for concurrent async calls.
+
+When several coroutines ask for the same key at the same time, only the first
+one runs the underlying call; the others await its result.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Share one in-flight execution per key among concurrent callers."""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `fn()` for `key`, or join the call already in flight for it.
+
+        The call runs as its own task, so cancelling one caller (for example
+        when a deadline expires) does not cancel the work other callers are
+        waiting on.
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Tasks from a previous event loop can't be awaited here
+            self._inflight = {}
+            self._loop = loop
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = loop.create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.shared += 1
+
+        return await asyncio.shield(task)
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Return True if a call for `key` is currently running."""
+        task = self._inflight.get(key)
+        return task is not None and not task.done()
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        """Drop a finished task and mark its exception as retrieved."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()
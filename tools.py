@@ -1,9 +1,10 @@
-from langchain.tools import tool
-from helpers import _search, _fetch, _search_and_fetch
+from functools import lru_cache
 
+from langchain_core.tools import StructuredTool
+from helpers import _search, _asearch, _fetch, _afetch, _search_and_fetch, _asearch_and_fetch
 
-@tool
-def search(query: str, max_results: int = 5) -> list[dict]:
+
+def _search_tool(query: str, max_results: int = 5) -> list[dict]:
     """Search the web and return a list of results with title, url, and snippet.
     
     Args:
@@ -17,22 +18,34 @@ def search(query: str, max_results: int = 5) -> list[dict]:
     return [r.model_dump() for r in results]
 
 
-@tool
-def fetch(url: str) -> dict:
+async def _asearch_tool(query: str, max_results: int = 5) -> list[dict]:
+    """Async implementation of the `search` tool."""
+    results = await _asearch(query, max_results)
+    return [r.model_dump() for r in results]
+
+
+def _fetch_tool(url: str) -> dict:
     """Fetch a webpage and return its main content as markdown.
     
     Args:
         url: The URL to fetch
     
     Returns:
-        Dict with 'url' and 'content' (markdown) fields
+        Dict with 'url' and 'content' (markdown) fields, plus 'content_type',
+        'bytes_read', 'truncated' and 'bytes_truncated' describing whether the
+        page was cut off at the download size limit
     """
     result = _fetch(url)
     return result.model_dump()
 
 
-@tool
-def search_and_fetch(query: str, max_results: int = 3) -> list[dict]:
+async def _afetch_tool(url: str) -> dict:
+    """Async implementation of the `fetch` tool."""
+    result = await _afetch(url)
+    return result.model_dump()
+
+
+def _search_and_fetch_tool(query: str, max_results: int = 3) -> list[dict]:
     """Search and fetch content from top results in one step.
     
     Args:
@@ -40,12 +53,48 @@ def search_and_fetch(query: str, max_results: int = 3) -> list[dict]:
         max_results: Maximum number of results to fetch (default: 3)
     
     Returns:
-        List of dicts with 'title', 'url', 'snippet', and 'content' fields
+        List of dicts with 'title', 'url', 'snippet', and 'content' fields.
+        'content' is null for pages that did not load in time; use the snippet
+        or fetch the URL separately. 'truncated' and 'bytes_truncated' tell
+        whether a page was cut off at the download size limit.
     """
     results = _search_and_fetch(query, max_results)
     return [r.model_dump() for r in results]
 
 
+async def _asearch_and_fetch_tool(query: str, max_results: int = 3) -> list[dict]:
+    """Async implementation of the `search_and_fetch` tool."""
+    results = await _asearch_and_fetch(query, max_results)
+    return [r.model_dump() for r in results]
+
+
+# Tools with a native coroutine: `ainvoke` awaits it directly instead of
+# running the blocking implementation in an executor thread.
+search = StructuredTool.from_function(
+    func=_search_tool,
+    coroutine=_asearch_tool,
+    name="search",
+)
+
+fetch = StructuredTool.from_function(
+    func=_fetch_tool,
+    coroutine=_afetch_tool,
+    name="fetch",
+)
+
+search_and_fetch = StructuredTool.from_function(
+    func=_search_and_fetch_tool,
+    coroutine=_asearch_and_fetch_tool,
+    name="search_and_fetch",
+)
+
+
 def get_all_tools() -> list:
     """Return a list of all available tools."""
-    return [search, fetch, search_and_fetch]
\ No newline at end of file
+    return [search, fetch, search_and_fetch]
+
+
+@lru_cache(maxsize=1)
+def get_tools_by_name() -> dict:
+    """Return the tool registry keyed by tool name, built once per process."""
+    return {t.name: t for t in get_all_tools()}
@@ -0,0 +1,330 @@
+"""
+Structured tracing for research runs.
+
+Spans nest as run → graph node → phase → worker → LLM call / tool call →
+search / fetch. Each span records its start time, duration, status and
+attributes such as token counts, URLs, bytes read and cache hits. The
+current span is held in a context variable, so spans opened in graph nodes,
+worker sub-graphs and asyncio tasks find their parent automatically.
+
+Finished spans are appended to `<TRACE_DIR>/<run_id>.jsonl`, one JSON object
+per line. When the `opentelemetry` SDK and an OTLP exporter are installed
+and OTEL_EXPORTER_OTLP_ENDPOINT is set, spans are also sent through
+OpenTelemetry.
+
+Configuration (environment variables):
+
+- TRACING_ENABLED (default true)
+- TRACE_DIR directory for JSONL traces (default traces)
+- OTEL_EXPORTER_OTLP_ENDPOINT enables the OpenTelemetry exporter
+
+Usage:
+    python -m tracing traces/<run_id>.jsonl   # print the critical path
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    """One timed operation within a trace."""
+
+    name: str
+    trace_id: str
+    span_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    parent_id: Optional[str] = None
+    kind: str = "internal"
+    start: float = field(default_factory=time.time)
+    end: Optional[float] = None
+    status: str = "ok"
+    error: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end is None:
+            return None
+        return (self.end - self.start) * 1000
+
+    def set(self, **attributes: Any) -> None:
+        """Add or update attributes; None values are skipped."""
+        self.attributes.update({key: value for key, value in attributes.items() if value is not None})
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start,
+            "end": self.end,
+            "duration_ms": round(self.duration_ms, 3) if self.duration_ms is not None else None,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class JsonlExporter:
+    """Append finished spans to one JSONL file per trace."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._files: Dict[str, TextIO] = {}
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span) -> None:
+        pass
+
+    def on_end(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            handle = self._files.get(span.trace_id)
+            if handle is None:
+                os.makedirs(self.directory, exist_ok=True)
+                handle = open(os.path.join(self.directory, f"{span.trace_id}.jsonl"), "a", encoding="utf-8")
+                self._files[span.trace_id] = handle
+            handle.write(line + "\n")
+            # The root span ends last; the trace is complete
+            if span.parent_id is None:
+                handle.close()
+                del self._files[span.trace_id]
+
+
+class OpenTelemetryExporter:
+    """Mirror spans into OpenTelemetry as they start and end."""
+
+    def __init__(self):
+        from opentelemetry import trace
+
+        self._trace = trace
+        self._tracer = trace.get_tracer("multi-agent-research")
+        self._live: Dict[str, Any] = {}
+
+    def on_start(self, span: Span) -> None:
+        parent = self._live.get(span.parent_id) if span.parent_id else None
+        context = self._trace.set_span_in_context(parent) if parent is not None else None
+        self._live[span.span_id] = self._tracer.start_span(
+            span.name, context=context, start_time=int(span.start * 1e9)
+        )
+
+    def on_end(self, span: Span) -> None:
+        from opentelemetry.trace import Status, StatusCode
+
+        otel_span = self._live.pop(span.span_id, None)
+        if otel_span is None:
+            return
+        otel_span.set_attributes({
+            key: value for key, value in {"kind": span.kind, **span.attributes}.items()
+            if isinstance(value, (str, bool, int, float))
+        })
+        if span.status != "ok":
+            otel_span.set_status(Status(StatusCode.ERROR, span.error or span.status))
+        otel_span.end(end_time=int(span.end * 1e9))
+
+
+def _opentelemetry_exporter() -> Optional[OpenTelemetryExporter]:
+    """Build the OpenTelemetry exporter if it is configured and installed."""
+    if not os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+        return None
+    try:
+        from opentelemetry import trace
+
+        # Install an OTLP pipeline unless the application already set a provider
+        if isinstance(trace.get_tracer_provider(), trace.ProxyTracerProvider):
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+            provider = TracerProvider(resource=Resource.create({
+                "service.name": os.getenv("OTEL_SERVICE_NAME", "multi-agent-research"),
+            }))
+            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+            trace.set_tracer_provider(provider)
+        return OpenTelemetryExporter()
+    except ImportError as e:
+        print(f"⚠ OTEL_EXPORTER_OTLP_ENDPOINT is set but OpenTelemetry is not installed ({e}); exporting JSONL only")
+        return None
+
+
+_exporters: Optional[List[Any]] = None
+_exporters_lock = threading.Lock()
+
+
+def get_exporters() -> List[Any]:
+    """Return the configured span exporters, created on first use."""
+    global _exporters
+    with _exporters_lock:
+        if _exporters is None:
+            _exporters = []
+            if os.getenv("TRACING_ENABLED", "true").strip().lower() not in ("0", "false", "no", "off"):
+                _exporters.append(JsonlExporter(os.getenv("TRACE_DIR", "traces")))
+                otel = _opentelemetry_exporter()
+                if otel is not None:
+                    _exporters.append(otel)
+    return _exporters
+
+
+def current_span() -> Optional[Span]:
+    """Return the innermost open span in this task, if any."""
+    return _current_span.get()
+
+
+def start_span(name: str, kind: str = "internal", parent: Optional[Span] = None, **attributes: Any) -> Optional[Span]:
+    """
+    Open a span without making it current; close it with `end_span`.
+
+    For operations that do not map to one block of code, such as a phase
+    whose workers run as separate tasks. Returns None when tracing is off
+    or there is no enclosing trace.
+    """
+    exporters = get_exporters()
+    parent = parent or current_span()
+    if not exporters or (parent is None and kind != "run"):
+        return None
+
+    span = Span(
+        name=name,
+        kind=kind,
+        trace_id=parent.trace_id if parent else attributes.get("run_id", uuid.uuid4().hex[:12]),
+        parent_id=parent.span_id if parent else None,
+    )
+    span.set(**attributes)
+    for exporter in exporters:
+        exporter.on_start(span)
+    return span
+
+
+def end_span(span: Optional[Span], error: Optional[BaseException] = None) -> None:
+    """Close a span from `start_span` and export it."""
+    if span is None:
+        return
+    span.end = span.start + (time.perf_counter() - span._started)
+    if error is not None:
+        span.status = "cancelled" if error.__class__.__name__ == "CancelledError" else "error"
+        span.error = f"{type(error).__name__}: {error}"
+    for exporter in get_exporters():
+        exporter.on_end(span)
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", parent: Optional[Span] = None, **attributes: Any) -> Iterator[Optional[Span]]:
+    """
+    Trace the block as a child of the current span (or `parent`).
+
+    Yields the Span, or None when tracing is off, so callers guard
+    attribute updates with `if s:`.
+    """
+    opened = start_span(name, kind, parent, **attributes)
+    if opened is None:
+        yield None
+        return
+
+    token = _current_span.set(opened)
+    try:
+        yield opened
+    except BaseException as e:
+        end_span(opened, e)
+        raise
+    else:
+        end_span(opened)
+    finally:
+        _current_span.reset(token)
+
+
+@contextmanager
+def trace_run(run_id: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Open the root span of a research run; its trace id is the run id."""
+    with span("run", kind="run", run_id=run_id, **attributes) as root:
+        yield root
+
+
+def _descendants(children: Dict[Optional[str], List[dict]], span_id: str, kind: str) -> List[dict]:
+    """All spans of `kind` below `span_id`."""
+    found, stack = [], list(children.get(span_id, []))
+    while stack:
+        s = stack.pop()
+        if s["kind"] == kind:
+            found.append(s)
+        stack.extend(children.get(s["span_id"], []))
+    return found
+
+
+def critical_path(spans: List[dict]) -> List[dict]:
+    """
+    Return the spans that determined the trace's duration, in order.
+
+    Graph nodes run one after another, so each is on the path. Inside a node
+    that ran workers, the path is the worker that finished last preceded by
+    the upstream workers it waited for (the `after` links).
+    """
+    children: Dict[Optional[str], List[dict]] = {}
+    for s in spans:
+        children.setdefault(s["parent_id"], []).append(s)
+    roots = children.get(None, [])
+    if not roots:
+        return []
+
+    root = roots[0]
+    by_id = {s["span_id"]: s for s in spans}
+    path = [root]
+    for node in sorted(children.get(root["span_id"], []), key=lambda s: s["start"]):
+        path.append(node)
+        workers = _descendants(children, node["span_id"], "worker")
+        if not workers:
+            continue
+        chain = [max(workers, key=lambda s: s["end"] or 0)]
+        while chain[-1]["attributes"].get("after") in by_id:
+            chain.append(by_id[chain[-1]["attributes"]["after"]])
+        path.extend(reversed(chain))
+    return path
+
+
+def main(argv: List[str]) -> None:
+    if len(argv) != 1:
+        print("Usage: python -m tracing traces/<run_id>.jsonl")
+        return
+    with open(argv[0], encoding="utf-8") as f:
+        spans = [json.loads(line) for line in f if line.strip()]
+
+    path = critical_path(spans)
+    if not path:
+        print("No root span found")
+        return
+
+    children: Dict[Optional[str], List[dict]] = {}
+    for s in spans:
+        children.setdefault(s["parent_id"], []).append(s)
+
+    root = path[0]
+    print(f"Critical path of {root['trace_id']} ({root['duration_ms'] / 1000:.1f}s):")
+    for s in path[1:]:
+        if s["kind"] != "worker":
+            print(f"  {s['name']:<24} {s['duration_ms'] / 1000:>8.2f}s")
+            continue
+        # The slowest operation inside the worker
+        calls = _descendants(children, s["span_id"], "llm") + _descendants(children, s["span_id"], "tool")
+        slowest = max(calls, key=lambda c: c["duration_ms"] or 0, default=None)
+        detail = ""
+        if slowest:
+            label = slowest["attributes"].get("url") or slowest["attributes"].get("query") or ""
+            detail = f"  slowest: {slowest['name']} {slowest['duration_ms'] / 1000:.2f}s {label}".rstrip()
+        print(f"    worker {s['attributes'].get('task', '')[:40]:<33} {s['duration_ms'] / 1000:>8.2f}s{detail}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,78 @@
+"""
+Digest of upstream results for downstream workers.
+
+A worker that depends on earlier tasks gets their findings in its prompt:
+the passages of each upstream output most relevant to the worker's own task,
+within a token budget, followed by the pages already fetched in this run.
+Later workers can then build on earlier research instead of repeating the
+same searches and fetches.
+
+Configuration (environment variables):
+
+- UPSTREAM_DIGEST_ENABLED (default true; set false to compare tool call counts)
+- UPSTREAM_DIGEST_TOKEN_BUDGET tokens for the whole digest (default 2000)
+"""
+
+import os
+from typing import Iterable, List
+
+from models import WorkerTask
+from passages import build_query, select_passages
+from utils import count_tokens
+
+FINDINGS_HEADER = "## Findings from earlier tasks"
+FETCHED_HEADER = "## Pages already fetched in this run"
+
+# Share of the budget for upstream findings; the rest lists fetched URLs
+FINDINGS_SHARE = 0.8
+
+# Most passages taken from one upstream output
+DIGEST_TOP_K = 6
+
+
+def digest_enabled() -> bool:
+    """Return True if workers should receive the upstream digest."""
+    return os.getenv("UPSTREAM_DIGEST_ENABLED", "true").strip().lower() not in ("0", "false", "no", "off")
+
+
+def digest_budget() -> int:
+    """Return the token budget for one worker's upstream digest."""
+    return int(os.getenv("UPSTREAM_DIGEST_TOKEN_BUDGET", "2000"))
+
+
+def build_upstream_digest(task: WorkerTask, upstream: List[WorkerTask], fetched_urls: Iterable[str]) -> str:
+    """
+    Build the digest of upstream findings and fetched pages for `task`.
+
+    Returns:
+        Markdown for the worker's prompt, or "" if there is nothing to share.
+    """
+    budget = digest_budget()
+    sections: List[str] = []
+
+    completed = [t for t in upstream if t.status == "completed" and t.output]
+    if completed:
+        query_weights = build_query(task.detailed_task_outline, task.description)
+        per_task_budget = int(budget * FINDINGS_SHARE) // len(completed)
+        findings = [FINDINGS_HEADER, "Build on these results rather than repeating their research."]
+        for upstream_task in completed:
+            content, _, _ = select_passages(upstream_task.output, query_weights, per_task_budget, DIGEST_TOP_K)
+            findings.append(f"### {upstream_task.name}\n{content}")
+        sections.append("\n\n".join(findings))
+
+    used = sum(count_tokens(section) for section in sections)
+    url_budget = max(0, budget - used)
+    urls: List[str] = []
+    for url in dict.fromkeys(fetched_urls):
+        line = f"- {url}"
+        cost = count_tokens(line)
+        if cost > url_budget:
+            break
+        urls.append(line)
+        url_budget -= cost
+    if urls:
+        sections.append(
+            f"{FETCHED_HEADER}\nOnly fetch these again if you need details missing above.\n" + "\n".join(urls)
+        )
+
+    return "\n\n".join(sections)
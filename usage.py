@@ -0,0 +1,153 @@
+"""
+Token, cost and latency accounting for a research run.
+
+Every LLM response's `usage_metadata` is recorded in the run's UsageLedger
+(see run_context.py) under the labels of the current usage scope: the graph
+node, and inside execution the phase and worker task. Nodes, phases and
+tasks also record their wall-clock time, so the ledger can show where a
+run's time and money went.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# USD per million tokens: (input, cached input, output)
+MODEL_PRICING: Dict[str, Tuple[float, float, float]] = {
+    "gpt-5-nano": (0.05, 0.005, 0.40),
+    "gpt-5-mini": (0.25, 0.025, 2.00),
+    "gpt-5": (1.25, 0.125, 10.00),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+}
+
+# Breakdown levels, from coarsest to finest
+SCOPE_KINDS = ("node", "phase", "task")
+
+_usage_scope: ContextVar[Dict[str, str]] = ContextVar("usage_scope", default={})
+
+
+def model_pricing(model: Optional[str]) -> Tuple[float, float, float]:
+    """Return per-million-token prices for a model name such as 'gpt-5-nano-2025-08-07'."""
+    if not model:
+        return (0.0, 0.0, 0.0)
+    matches = [name for name in MODEL_PRICING if model.startswith(name)]
+    if not matches:
+        return (0.0, 0.0, 0.0)
+    return MODEL_PRICING[max(matches, key=len)]
+
+
+@dataclass
+class Usage:
+    """Accumulated LLM usage and time for one scope."""
+
+    calls: int = 0
+    input_tokens: int = 0
+    cached_tokens: int = 0
+    output_tokens: int = 0
+    total_tokens: int = 0
+    cost_usd: float = 0.0
+    llm_seconds: float = 0.0
+    wall_seconds: float = 0.0
+
+    def add_call(self, input_tokens: int, cached_tokens: int, output_tokens: int, cost: float, seconds: float) -> None:
+        self.calls += 1
+        self.input_tokens += input_tokens
+        self.cached_tokens += cached_tokens
+        self.output_tokens += output_tokens
+        self.total_tokens += input_tokens + output_tokens
+        self.cost_usd += cost
+        self.llm_seconds += seconds
+
+
+@dataclass
+class UsageLedger:
+    """Usage totals for a run, broken down by node, phase and task."""
+
+    totals: Usage = field(default_factory=Usage)
+    breakdown: Dict[str, Dict[str, Usage]] = field(default_factory=lambda: {kind: {} for kind in SCOPE_KINDS})
+
+    def record_llm(self, message, seconds: float) -> None:
+        """Add one LLM response's usage to the totals and the current scopes."""
+        usage = getattr(message, "usage_metadata", None) or {}
+        input_tokens = usage.get("input_tokens", 0)
+        output_tokens = usage.get("output_tokens", 0)
+        cached_tokens = (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+
+        metadata = getattr(message, "response_metadata", None) or {}
+        input_price, cached_price, output_price = model_pricing(metadata.get("model_name"))
+        cost = (
+            (input_tokens - cached_tokens) * input_price
+            + cached_tokens * cached_price
+            + output_tokens * output_price
+        ) / 1_000_000
+
+        self.totals.add_call(input_tokens, cached_tokens, output_tokens, cost, seconds)
+        for kind, label in _usage_scope.get().items():
+            self.breakdown[kind].setdefault(label, Usage()).add_call(
+                input_tokens, cached_tokens, output_tokens, cost, seconds
+            )
+
+    def record_wall(self, kind: str, label: str, seconds: float) -> None:
+        """Add wall-clock time spent in a node, phase or task."""
+        self.breakdown[kind].setdefault(label, Usage()).wall_seconds += seconds
+
+    def to_dict(self) -> dict:
+        """Plain-dict form for AgentState and JSON."""
+        return {
+            "totals": asdict(self.totals),
+            **{
+                kind: {label: asdict(usage) for label, usage in scopes.items()}
+                for kind, scopes in self.breakdown.items()
+            },
+        }
+
+    def format_breakdown(self) -> str:
+        """Human-readable cost and latency table."""
+        lines: List[str] = []
+        header = f"  {'':<40} {'calls':>6} {'tokens':>10} {'cost $':>9} {'llm s':>8} {'wall s':>8}"
+        for kind in SCOPE_KINDS:
+            scopes = self.breakdown[kind]
+            if not scopes:
+                continue
+            lines.append(f"By {kind}:")
+            lines.append(header)
+            for label, usage in scopes.items():
+                lines.append(
+                    f"  {label[:40]:<40} {usage.calls:>6} {usage.total_tokens:>10,} {usage.cost_usd:>9.4f} "
+                    f"{usage.llm_seconds:>8.1f} {usage.wall_seconds:>8.1f}"
+                )
+        totals = self.totals
+        lines.append(
+            f"Total: {totals.calls} LLM calls, {totals.total_tokens:,} tokens "
+            f"({totals.input_tokens:,} in, {totals.cached_tokens:,} cached, {totals.output_tokens:,} out), "
+            f"${totals.cost_usd:.4f}, {totals.llm_seconds:.1f}s in LLM calls"
+        )
+        return "\n".join(lines)
+
+
+@contextmanager
+def usage_scope(**labels: str) -> Iterator[None]:
+    """Attribute LLM usage inside the block to the given node, phase and/or task."""
+    token = _usage_scope.set({**_usage_scope.get(), **labels})
+    try:
+        yield
+    finally:
+        _usage_scope.reset(token)
+
+
+@contextmanager
+def timed_scope(ledger: Optional[UsageLedger], kind: str, label: str) -> Iterator[None]:
+    """Attribute usage to `label` and record the block's wall-clock time under it."""
+    started = time.perf_counter()
+    with usage_scope(**{kind: label}):
+        try:
+            yield
+        finally:
+            if ledger is not None:
+                ledger.record_wall(kind, label, time.perf_counter() - started)
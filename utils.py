@@ -1,15 +1,283 @@
+import contextlib
 import dotenv
+import json
 import os
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 from dotenv import load_dotenv
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable
 from langchain_openai import ChatOpenAI
 
+from concurrency import get_llm_limiter
+from http_client import get_openai_async_client, get_openai_sync_client
+from rate_limiter import get_rate_limiter, output_token_estimate
+from retry import call_with_retry, llm_retry_policy
+from run_context import current_run
+from tracing import span
+
 load_dotenv()
 
-def get_llm(temperature: float = 0) -> ChatOpenAI:
-    """Initialize and return a ChatOpenAI instance with the given temperature."""
-    return ChatOpenAI(
-            model="gpt-5-nano",
-            temperature=temperature,
-            openai_api_key=os.getenv("OPENAI_API_KEY")
-        )
+DEFAULT_MODEL = "gpt-5-nano"
+
+# Fixed per-message overhead in the chat format
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Chat clients and tool-bound variants keyed by (model, temperature, tool names)
+_llm_registry: Dict[Tuple[str, float, Optional[Tuple[str, ...]]], Runnable] = {}
+_llm_registry_http_client = None
+_llm_registry_lock = threading.Lock()
+
+
+def get_llm(temperature: float = 0, tools: Optional[Sequence] = None, model: str = DEFAULT_MODEL):
+    """
+    Return a shared ChatOpenAI instance for the model and temperature.
+
+    Every instance sends its requests through one pooled HTTP client (see
+    http_client.py), so connections to the API are reused and bounded. With
+    `tools`, the tool-bound variant is returned; it is cached as well, since
+    `bind_tools` converts every tool to its JSON schema.
+
+    The registry is cleared whenever the pooled client is replaced, because
+    an async client cannot be shared across event loops.
+    """
+    global _llm_registry_http_client
+
+    http_async_client = get_openai_async_client()
+    key = (model, temperature, tuple(tool.name for tool in tools) if tools is not None else None)
+
+    with _llm_registry_lock:
+        if http_async_client is not _llm_registry_http_client:
+            _llm_registry.clear()
+            _llm_registry_http_client = http_async_client
+
+        llm = _llm_registry.get(key)
+        if llm is None:
+            base_key = (model, temperature, None)
+            base = _llm_registry.get(base_key)
+            if base is None:
+                base = ChatOpenAI(
+                    model=model,
+                    temperature=temperature,
+                    openai_api_key=os.getenv("OPENAI_API_KEY"),
+                    # Retries are handled by retry.call_with_retry in ainvoke_llm
+                    max_retries=0,
+                    # Report token usage on streamed responses too (see astream_llm)
+                    stream_usage=True,
+                    http_async_client=http_async_client,
+                    http_client=get_openai_sync_client(),
+                )
+                _llm_registry[base_key] = base
+            llm = base if tools is None else base.bind_tools(list(tools))
+            _llm_registry[key] = llm
+    return llm
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """Load the tiktoken encoding once; None if tiktoken or its data is unavailable."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens in text with tiktoken, or estimate ~4 characters per token if unavailable."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def message_tokens(message: BaseMessage) -> int:
+    """Approximate the tokens a message contributes to the prompt."""
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content)
+    tokens = count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+    for call in getattr(message, "tool_calls", None) or []:
+        tokens += count_tokens(call["name"]) + count_tokens(json.dumps(call["args"]))
+    return tokens
+
+
+def count_message_tokens(messages: List[BaseMessage]) -> int:
+    """Approximate the prompt tokens of a message list."""
+    return sum(message_tokens(m) for m in messages)
+
+
+def _usage_tokens(message) -> Optional[int]:
+    """Total tokens reported in a response's usage metadata, if any."""
+    usage = getattr(message, "usage_metadata", None)
+    return usage.get("total_tokens") if usage else None
+
+
+def _report_error(feedback, error: BaseException) -> None:
+    """Tell an AdaptiveLimiter about a failed LLM request."""
+    from openai import APIError, RateLimitError
+
+    if isinstance(error, RateLimitError):
+        feedback.record_rate_limited()
+    elif isinstance(error, (APIError, TimeoutError)):
+        feedback.record_error()
+
+
+async def ainvoke_llm(llm, messages: List[BaseMessage], feedback=None):
+    """
+    Send one LLM request through the shared retry policy, the process-wide
+    LLM concurrency cap and the RPM/TPM rate limiter.
+
+    Each attempt reserves the request's tokens (prompt, bound tool schemas and
+    a completion allowance) before it is sent and corrects the reservation
+    afterwards from the reported usage, which is also recorded in the run's
+    usage ledger. Models from
+    `with_structured_output(..., include_raw=True)` are unwrapped to the
+    parsed object, raising any parsing error.
+
+    Args:
+        llm: A chat model, tool-bound model or structured-output runnable
+        messages: The prompt
+        feedback: Optional AdaptiveLimiter told about the latency of successful
+            requests and about rate limit and API errors
+    """
+    estimate = count_message_tokens(messages) + output_token_estimate()
+    tools = getattr(llm, "kwargs", {}).get("tools")
+    if tools:
+        estimate += count_tokens(json.dumps(tools))
+
+    limiter = get_rate_limiter()
+    llm_limiter = get_llm_limiter()
+
+    async def attempt(timed):
+        with span("llm.call", kind="llm", estimated_tokens=estimate, messages=len(messages)) as s:
+            waiting = time.perf_counter()
+            async with llm_limiter.slot() if llm_limiter else contextlib.nullcontext():
+                queued = time.perf_counter()
+                reserved = await limiter.acquire(estimate)
+                started = time.perf_counter()
+                result = await timed(llm.ainvoke(messages))
+                latency = time.perf_counter() - started
+            if feedback is not None:
+                feedback.record_success(latency)
+
+            message = result["raw"] if isinstance(result, dict) and "raw" in result else result
+            limiter.reconcile(reserved, _usage_tokens(message))
+            run = current_run()
+            if run is not None:
+                run.usage.record_llm(message, latency)
+
+            if s:
+                usage = getattr(message, "usage_metadata", None) or {}
+                s.set(
+                    model=(getattr(message, "response_metadata", None) or {}).get("model_name"),
+                    input_tokens=usage.get("input_tokens"),
+                    output_tokens=usage.get("output_tokens"),
+                    concurrency_wait_ms=round((queued - waiting) * 1000, 3),
+                    rate_limit_wait_ms=round((started - queued) * 1000, 3),
+                    latency_ms=round(latency * 1000, 3),
+                    tool_calls=len(getattr(message, "tool_calls", None) or []),
+                )
+
+        if message is not result:
+            if result.get("parsing_error"):
+                raise result["parsing_error"]
+            return result["parsed"]
+        return result
+
+    on_error = (lambda error: _report_error(feedback, error)) if feedback is not None else None
+    return await call_with_retry(attempt, llm_retry_policy(), on_error=on_error, timed_section=True)
+
+
+class StreamInterruptedError(RuntimeError):
+    """A streamed LLM response failed after part of it was passed on; retrying would repeat that part."""
+
+
+async def astream_llm(llm, messages: List[BaseMessage], on_text: Callable[[str], None]) -> Tuple[object, dict]:
+    """
+    Stream one LLM response under the same retry policy and limits as `ainvoke_llm`.
+
+    Each text chunk is passed to `on_text` as it arrives. A failure before the
+    first chunk is retried like any call; a failure after it raises
+    StreamInterruptedError, since the text already passed on cannot be taken back.
+    A stream that ends without any chunk is replaced by one non-streamed request.
+
+    Returns:
+        The complete response message, and stream timing: `ttft_seconds`
+        (request sent to first text), `seconds`, `output_tokens` and
+        `tokens_per_second` (after the first token)
+    """
+    estimate = count_message_tokens(messages) + output_token_estimate()
+    limiter = get_rate_limiter()
+    llm_limiter = get_llm_limiter()
+    delivered = False
+
+    async def attempt(timed):
+        nonlocal delivered
+        if delivered:
+            raise StreamInterruptedError("LLM stream failed after text was streamed")
+
+        with span("llm.stream", kind="llm", estimated_tokens=estimate, messages=len(messages)) as s:
+            async with llm_limiter.slot() if llm_limiter else contextlib.nullcontext():
+                reserved = await limiter.acquire(estimate)
+                started = time.perf_counter()
+                first_token = None
+                message = None
+
+                async def consume():
+                    nonlocal delivered, first_token, message
+                    async for chunk in llm.astream(messages):
+                        message = chunk if message is None else message + chunk
+                        if isinstance(chunk.content, str) and chunk.content:
+                            if first_token is None:
+                                first_token = time.perf_counter()
+                            delivered = True
+                            on_text(chunk.content)
+
+                try:
+                    await timed(consume())
+                except Exception as e:
+                    if delivered:
+                        raise StreamInterruptedError(f"LLM stream failed after text was streamed: {e}") from e
+                    raise
+
+                if message is None:
+                    # The stream ended without a single chunk; ask again without streaming
+                    print("⚠ LLM stream returned no chunks; retrying without streaming")
+                    reserved += await limiter.acquire(estimate)
+                    message = await timed(llm.ainvoke(messages))
+                    if isinstance(message.content, str) and message.content:
+                        first_token = time.perf_counter()
+                        delivered = True
+                        on_text(message.content)
+                latency = time.perf_counter() - started
+
+            limiter.reconcile(reserved, _usage_tokens(message))
+            run = current_run()
+            if run is not None:
+                run.usage.record_llm(message, latency)
+
+            usage = getattr(message, "usage_metadata", None) or {}
+            output_tokens = usage.get("output_tokens") or count_tokens(message.content)
+            ttft = (first_token - started) if first_token is not None else latency
+            generating = latency - ttft
+            stats = {
+                "ttft_seconds": round(ttft, 3),
+                "seconds": round(latency, 3),
+                "output_tokens": output_tokens,
+                "tokens_per_second": round(output_tokens / generating, 1) if generating > 0 else 0.0,
+            }
+            if s:
+                s.set(
+                    model=(getattr(message, "response_metadata", None) or {}).get("model_name"),
+                    input_tokens=usage.get("input_tokens"),
+                    output_tokens=output_tokens,
+                    ttft_ms=round(ttft * 1000, 3),
+                    latency_ms=round(latency * 1000, 3),
+                    tokens_per_second=stats["tokens_per_second"],
+                )
+        return message, stats
 
+    return await call_with_retry(attempt, llm_retry_policy(), timed_section=True)